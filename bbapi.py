@@ -1,39 +1,115 @@
-from typing import Set
+import io
+import logging
+import threading
+import time
+from typing import BinaryIO, Optional, Set
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import xml.etree.ElementTree as xml
 from pprint import pprint
 from team import Team
 from player import Player
 from stats import *
-from os.path import exists
+from store import DEFAULT_STORE, Store, open_store
+from xml_readers import iter_xml
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+log = logging.getLogger(__name__)
+
+
+BBAPI_URL = "http://bbapi.buzzerbeater.com/"
+# Requests per second to the API unless told otherwise, polite to a shared host
+DEFAULT_RATE = 2.0
+
+
+class RateLimiter:
+    """Spaces requests at least 1/rate seconds apart, shared between threads."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        if start > now:
+            time.sleep(start - now)
 
 
 class Network:
-    def __init__(self):
-        self.cookies = None
+    def __init__(
+        self,
+        base_url: str = BBAPI_URL,
+        pool_size: int = 10,
+        timeout: float = 30.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        rate: Optional[float] = DEFAULT_RATE,
+    ):
+        self.base_url = base_url
+        self.timeout = timeout
+        # None or 0 turns the limit off, e.g. for a local test server
+        self.limiter = RateLimiter(rate) if rate else None
+
+        # Idempotent GETs only, so connection errors, read errors and
+        # throttling / server errors are all safe to retry.
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, path: str) -> str:
+        if path.startswith(("http://", "https://")):
+            return path
+        return self.base_url + path
 
     def first_get(self, url, parameters=None):
-        r = requests.get(url, cookies=self.cookies, params=parameters)
-        self.cookies = r.cookies
-        return r.text
+        # Login, the session keeps the returned cookies for later requests
+        self.session.cookies.clear()
+        return self.get(url, parameters)
 
     def get(self, url, parameters=None):
-        r = requests.get(url, cookies=self.cookies, params=parameters)
+        if self.limiter is not None:
+            self.limiter.wait()
+        r = self.session.get(self.url(url), params=parameters, timeout=self.timeout)
         return r.text
 
+    def close(self):
+        self.session.close()
+
 
 class BBApi:
-    def __init__(self, login=None, password=None):
+    def __init__(
+        self,
+        login=None,
+        password=None,
+        network: Optional[Network] = None,
+        store: Optional[Store] = None,
+    ):
+        # Responses are cached here, see store.py
+        self.store = store if store is not None else open_store(DEFAULT_STORE)
         if login is None or password is None:
             return
 
         self.login = login
         self.password = password
         self.logged_in = False
-        self.network = Network()
+        self.network = network if network is not None else Network()
 
         p = {"login": self.login, "code": self.password}
-        data = self.network.first_get("http://bbapi.buzzerbeater.com/login.aspx", p)
+        data = self.network.first_get("login.aspx", p)
 
         root = xml.fromstring(data)
         if root.tag == "bbapi":
@@ -48,7 +124,7 @@ class BBApi:
 
     def arena(self, teamid=0):
         p = {"teamid": teamid}
-        data = self.network.get("http://bbapi.buzzerbeater.com/arena.aspx", p)
+        data = self.network.get("arena.aspx", p)
 
         root = xml.fromstring(data)
         arena = root.find("arena")
@@ -75,245 +151,293 @@ class BBApi:
 
         return arena_name, arena_seats, arena_expansion
 
-    def get_xml_boxscore(self, matchid) -> str:
-
-        path = f"matches/boxscore_{matchid}.xml"
-
-        if exists(path):
-            with open(path, mode="r", encoding='utf-8') as f:
-                return f.read()
-        else:
-            p = {"matchid": matchid}
-            text = self.network.get("http://bbapi.buzzerbeater.com/boxscore.aspx", p)
-
-            with open(path, mode="w", encoding='utf-8') as f:
-                f.write(text)
+    def get_cached(self, name: str, endpoint: str, parameters: dict) -> str:
+        """Response of endpoint, read from the store if fetched before."""
+        text = self.store.get(name)
+        if text is None:
+            text = self.network.get(endpoint, parameters)
+            self.store.put(name, text)
+        return text
 
-            return text
+    def get_xml_boxscore(self, matchid) -> str:
+        p = {"matchid": matchid}
+        return self.get_cached(f"boxscore_{matchid}.xml", "boxscore.aspx", p)
 
     def get_xml_standings(self, leagueid: int, season: int) -> str:
-
-        path = f"matches/standings_{leagueid}_{season}.xml"
-
-        if exists(path):
-            with open(path, mode="r", encoding='utf-8') as f:
-                return f.read()
-        else:
-            p = {"leagueid": str(leagueid), "season": str(season)}
-            text = self.network.get("http://bbapi.buzzerbeater.com/standings.aspx", p)
-
-            with open(path, mode="w", encoding='utf-8') as f:
-                f.write(text)
-
-            return text
+        p = {"leagueid": str(leagueid), "season": str(season)}
+        return self.get_cached(
+            f"standings_{leagueid}_{season}.xml", "standings.aspx", p
+        )
 
     def get_xml_schedule(self, teamid, season) -> str:
-
-        path = f"matches/schedule_{teamid}_{season}.xml"
-
-        if exists(path):
-            with open(path, mode="r", encoding='utf-8') as f:
-                return f.read()
-        else:
-            p = {"teamid": teamid, "season": season}
-            text = self.network.get("http://bbapi.buzzerbeater.com/schedule.aspx", p)
-
-            with open(path, mode="w", encoding='utf-8') as f:
-                f.write(text)
-
-            return text
+        p = {"teamid": teamid, "season": season}
+        return self.get_cached(f"schedule_{teamid}_{season}.xml", "schedule.aspx", p)
 
     def player(self, playerid) -> str:
         p = {"playerid": playerid}
-        data = self.network.get("http://bbapi.buzzerbeater.com/player.aspx", p)
+        data = self.network.get("player.aspx", p)
 
         root = xml.fromstring(data)
         position = root.find("./player/bestPosition")
 
         return position.text
 
-    def strategy(self, matchid=0):
-        data = self.get_xml_boxscore(matchid)
-
-        root = xml.fromstring(data)
-        away_off = root.find("./match/awayTeam/offStrategy").text
-        away_def = root.find("./match/awayTeam/defStrategy").text
-        home_off = root.find("./match/homeTeam/offStrategy").text
-        home_def = root.find("./match/homeTeam/defStrategy").text
+    def open_cached(self, name: str, endpoint: str, parameters: dict) -> BinaryIO:
+        """Like get_cached, as a stream. Cached entries are read straight
+        from the store instead of into one string first."""
+        stream = self.store.open(name)
+        if stream is None:
+            stream = io.BytesIO(
+                self.get_cached(name, endpoint, parameters).encode("utf-8")
+            )
+        return stream
 
-        return away_off, away_def, home_off, home_def
+    def strategy(self, matchid=0):
+        away, home = self.boxscore(matchid)
+        return (
+            away.off_strategy,
+            away.def_strategy,
+            home.off_strategy,
+            home.def_strategy,
+        )
 
     def boxscore(self, matchid=0) -> list[Team]:
-        data = self.get_xml_boxscore(matchid)
-
-        root = xml.fromstring(data)
-        away = root.find("./match/awayTeam")
-        home = root.find("./match/homeTeam")
-        xml_teams = [away, home]
-        bb_teams = [Team(), Team()]
-
-        for index, xml_team in enumerate(xml_teams):
-            bb_team = bb_teams[index]
-
-            assert isinstance(xml_team, xml.Element), ""
-            bb_team.id = int(xml_team.attrib["id"])
-            bb_team.name = xml_team.find("./teamName").text
-
-            bb_team.off_strategy = xml_team.find("./offStrategy").text
-            bb_team.def_strategy = xml_team.find("./defStrategy").text
-
-            quarters = xml_team.find("./score").attrib["partials"].split(",")
-            for i in range(len(quarters)):
-                bb_team.push_stat_sheet()
-            for num, pts in enumerate(quarters):
-                bb_team.stats.qtr[num].sheet[Statistic.Points] = pts
-
-            totals = xml_team.find("./boxscore/teamTotals")
-
-            def add_team_stat(stat: Statistic, val: int):
-                bb_team.stats.full.sheet[stat] = val
-
-            def team_stat(s: str) -> int:
-                return int(totals.find(s).text)
-
-            add_team_stat(Statistic.Points, team_stat("./pts"))
-            add_team_stat(Statistic.FieldGoalsAtt, team_stat("./fga"))
-            add_team_stat(Statistic.FieldGoalsMade, team_stat("./fgm"))
-            add_team_stat(Statistic.ThreePointsAtt, team_stat("./tpa"))
-            add_team_stat(Statistic.ThreePointsMade, team_stat("./tpm"))
-            add_team_stat(Statistic.FreeThrowsAtt, team_stat("./fta"))
-            add_team_stat(Statistic.FreeThrowsMade, team_stat("./ftm"))
-            add_team_stat(Statistic.OffRebounds, team_stat("./oreb"))
-            add_team_stat(
-                Statistic.DefRebounds, team_stat("./reb") - team_stat("./oreb")
-            )
-            add_team_stat(Statistic.Assists, team_stat("./ast"))
-            add_team_stat(Statistic.Turnovers, team_stat("./to"))
-            add_team_stat(Statistic.Steals, team_stat("./stl"))
-            add_team_stat(Statistic.Blocks, team_stat("./blk"))
-            add_team_stat(Statistic.Fouls, team_stat("./pf"))
-
-            players = xml_team.findall("./boxscore/player")
-            for xml_player in players:
-                bb_player = Player()
-
-                assert isinstance(xml_player, xml.Element), ""
-                bb_player.id = int(xml_player.attrib["id"])
-                bb_player.name = f"{xml_player.find('./firstName').text} {xml_player.find('./lastName').text}"
-
-                perf = xml_player.find("./performance")
-                mins = xml_player.find("./minutes")
-
-                def add_stat(s: Statistic, val: int):
-                    bb_player.stats.full.sheet[s] = val
-
-                def stat(s: str) -> int:
-                    return int(perf.find(s).text)
-
-                def minutes(s: str) -> int:
-                    return int(mins.find(s).text)
-
-                add_stat(Statistic.SecsPG, minutes("./PG") * 60)
-                add_stat(Statistic.SecsSG, minutes("./SG") * 60)
-                add_stat(Statistic.SecsSF, minutes("./SF") * 60)
-                add_stat(Statistic.SecsPF, minutes("./PF") * 60)
-                add_stat(Statistic.SecsC, minutes("./C") * 60)
-
-                add_stat(Statistic.Points, stat("./pts"))
-                add_stat(Statistic.FieldGoalsAtt, stat("./fga"))
-                add_stat(Statistic.FieldGoalsMade, stat("./fgm"))
-                add_stat(Statistic.ThreePointsAtt, stat("./tpa"))
-                add_stat(Statistic.ThreePointsMade, stat("./tpm"))
-                add_stat(Statistic.FreeThrowsAtt, stat("./fta"))
-                add_stat(Statistic.FreeThrowsMade, stat("./ftm"))
-                add_stat(Statistic.OffRebounds, stat("./oreb"))
-                add_stat(
-                    Statistic.DefRebounds,
-                    (stat("./reb") - stat("./oreb")),
-                )
-                add_stat(Statistic.Assists, stat("./ast"))
-                add_stat(Statistic.Turnovers, stat("./to"))
-                add_stat(Statistic.Steals, stat("./stl"))
-                add_stat(Statistic.Blocks, stat("./blk"))
-                add_stat(Statistic.Fouls, stat("./pf"))
-                bb_team.players.append(bb_player)
-
-        return bb_teams
+        p = {"matchid": matchid}
+        with self.open_cached(f"boxscore_{matchid}.xml", "boxscore.aspx", p) as f:
+            return read_boxscore(f)
 
     def standings(self, league_id: int, season: int):
-        data = self.get_xml_standings(league_id, season)
-
-        root = xml.fromstring(data)
-        teams = root.findall("./standings/regularSeason/conference/team")
-        team_ids = [team.attrib["id"] for team in teams]
-
-        return team_ids
+        p = {"leagueid": str(league_id), "season": str(season)}
+        name = f"standings_{league_id}_{season}.xml"
+        with self.open_cached(name, "standings.aspx", p) as f:
+            return read_standings(f)
 
     def schedule(self, team_id, season):
-        data = self.get_xml_schedule(team_id, season)
-
-        root = xml.fromstring(data)
-        matches = root.findall("./schedule/match")
+        p = {"teamid": team_id, "season": season}
+        name = f"schedule_{team_id}_{season}.xml"
+        with self.open_cached(name, "schedule.aspx", p) as f:
+            return read_schedule(f)
+
+
+# Boxscore tags of the team totals and player performance.
+BOXSCORE_STATS = {
+    "pts": Statistic.Points,
+    "fga": Statistic.FieldGoalsAtt,
+    "fgm": Statistic.FieldGoalsMade,
+    "tpa": Statistic.ThreePointsAtt,
+    "tpm": Statistic.ThreePointsMade,
+    "fta": Statistic.FreeThrowsAtt,
+    "ftm": Statistic.FreeThrowsMade,
+    "oreb": Statistic.OffRebounds,
+    "ast": Statistic.Assists,
+    "to": Statistic.Turnovers,
+    "stl": Statistic.Steals,
+    "blk": Statistic.Blocks,
+    "pf": Statistic.Fouls,
+}
+
+MINUTES_STATS = {
+    "PG": Statistic.SecsPG,
+    "SG": Statistic.SecsSG,
+    "SF": Statistic.SecsSF,
+    "PF": Statistic.SecsPF,
+    "C": Statistic.SecsC,
+}
+
+
+def read_boxscore(source) -> list[Team]:
+    """Away and home team of a boxscore.aspx response, in that order."""
+    bb_teams = {"awayTeam": Team(), "homeTeam": Team()}
+    team = player = None
+    names: list[str] = []
+    rebounds = 0
+
+    for event, path, elem in iter_xml(source):
+        if len(path) < 3 or path[1] != "match" or path[2] not in bb_teams:
+            continue
+        rel = path[3:]
+
+        if event == "start":
+            if not rel:
+                team = bb_teams[path[2]]
+                team.id = int(elem.attrib["id"])
+            elif rel == ("boxscore", "player"):
+                player = Player()
+                player.id = int(elem.attrib["id"])
+                names = []
+                rebounds = 0
+            continue
+
+        assert team is not None
+        if rel == ("teamName",):
+            team.name = elem.text
+        elif rel == ("offStrategy",):
+            team.off_strategy = elem.text
+        elif rel == ("defStrategy",):
+            team.def_strategy = elem.text
+        elif rel == ("score",):
+            quarters = elem.attrib["partials"].split(",")
+            for i in range(len(quarters)):
+                team.push_stat_sheet()
+            for num, pts in enumerate(quarters):
+                team.stats.qtr[num].sheet[Statistic.Points] = int(pts)
+        elif rel[:2] == ("boxscore", "teamTotals") and len(rel) == 3:
+            sheet = team.stats.full.sheet
+            if rel[2] == "reb":
+                rebounds = int(elem.text)
+            elif rel[2] in BOXSCORE_STATS:
+                sheet[BOXSCORE_STATS[rel[2]]] = int(elem.text)
+        elif rel == ("boxscore", "teamTotals"):
+            sheet = team.stats.full.sheet
+            sheet[Statistic.DefRebounds] = rebounds - sheet[Statistic.OffRebounds]
+        elif rel[:2] == ("boxscore", "player") and len(rel) > 2:
+            assert player is not None
+            sheet = player.stats.full.sheet
+            if rel[2] in ("firstName", "lastName"):
+                names.append(elem.text)
+            elif rel[2] == "minutes" and len(rel) == 4 and rel[3] in MINUTES_STATS:
+                sheet[MINUTES_STATS[rel[3]]] = int(elem.text) * 60
+            elif rel[2] == "performance" and len(rel) == 4:
+                if rel[3] == "reb":
+                    rebounds = int(elem.text)
+                elif rel[3] in BOXSCORE_STATS:
+                    sheet[BOXSCORE_STATS[rel[3]]] = int(elem.text)
+        elif rel == ("boxscore", "player"):
+            assert player is not None
+            sheet = player.stats.full.sheet
+            sheet[Statistic.DefRebounds] = rebounds - sheet[Statistic.OffRebounds]
+            player.name = " ".join(names)
+            team.players.append(player)
+            player = None
+        elif not rel:
+            team = None
+
+    return [bb_teams["awayTeam"], bb_teams["homeTeam"]]
+
+
+def read_standings(source) -> list[str]:
+    """Team IDs of a standings.aspx response."""
+    # These are small, building the tree in C beats any per element loop
+    root = xml.parse(source).getroot()
+    teams = root.findall("./standings/regularSeason/conference/team")
+    return [team.attrib["id"] for team in teams]
+
+
+def read_schedule(source) -> list[str]:
+    """IDs of the league matches in a schedule.aspx response."""
+    root = xml.parse(source).getroot()
+    return [
+        match.attrib["id"]
+        for match in root.findall("./schedule/match")
+        if match.attrib["type"].startswith("league")
+    ]
 
-        match_ids = [
-            match.attrib["id"]
-            for match in matches
-            if match.attrib["type"].startswith("league")
-        ]
 
-        return match_ids
+LEAGUE_IDS = [
+    1,  # USA
+    86,  # Argentina,
+    107,  # Brasil
+    128,  # Canada
+    149,  # China
+    170,  # Turkiye
+    191,  # Espana
+    212,  # Deutschland
+    254,  # Italia
+    275,  # France
+    296,  # Hellas
+    893,  # Belgium
+    978,  # England
+    999,  # Isreal
+    1020,  # Nederland
+    1062,  # Portugal
+    1083,  # Rossiya
+    1104,  # Lietuva
+    1277,  # Srbija
+    2083,  # Polska
+]
+
+
+class Prefetcher:
+    """Downloads standings, schedules and boxscores into the cache.
+
+    Requests run on a bounded thread pool as soon as their input is known, a
+    schedule is fetched when its standings arrive and the boxscores of a
+    schedule are queued right away instead of after every schedule. Anything
+    already in the cache is not requested again, so an interrupted run can
+    simply be restarted. Politeness towards the server is up to the Network,
+    its rate limit (DEFAULT_RATE unless overridden) and pool size.
+    """
+
+    def __init__(self, api: BBApi, workers: int = 8) -> None:
+        self.api = api
+        self.workers = workers
+        self.match_ids: set[str] = set()
+        self.failed: list[tuple] = []
+
+    def run(self, leagueids: list[int], seasons: list[int]) -> set[str]:
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {}
+
+            def submit(fn, *args):
+                pending[pool.submit(fn, *args)] = (fn, args)
+
+            for season in seasons:
+                for leagueid in leagueids:
+                    submit(self.api.standings, leagueid, season)
+
+            # Only this thread looks at results and submits follow-ups.
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    fn, args = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        log.warning("%s%s failed: %r", fn.__name__, args, e)
+                        self.failed.append((fn.__name__, args))
+                        continue
+
+                    if fn == self.api.standings:
+                        leagueid, season = args
+                        log.info("Season %s: teams: %d", season, len(result))
+                        for team_id in result:
+                            submit(self.api.schedule, team_id, season)
+                    elif fn == self.api.schedule:
+                        team_id, season = args
+                        log.info("Team %s, Season %s: matches: %d", *args, len(result))
+                        for match_id in result:
+                            if match_id not in self.match_ids:
+                                self.match_ids.add(match_id)
+                                submit(self.api.get_xml_boxscore, match_id)
+                    else:
+                        log.info("Fetched %s (%d)", args[0], len(self.match_ids))
+
+        return self.match_ids
 
 
 def prefetch_data(
-    username: str, password: str, leagueid_: int, season_from: int, season_to: int
+    username: str,
+    password: str,
+    leagueid_: Optional[int],
+    season_from: int,
+    season_to: int,
+    network: Optional[Network] = None,
+    workers: int = 8,
+    store: Optional[Store] = None,
 ):
-    api = BBApi(username, password)
-
-    unique_ids = set[str]()
-
-    leagueids = [
-        1,  # USA
-        86,  # Argentina,
-        107,  # Brasil
-        128,  # Canada
-        149,  # China
-        170,  # Turkiye
-        191,  # Espana
-        212,  # Deutschland
-        254,  # Italia
-        275,  # France
-        296,  # Hellas
-        893,  # Belgium
-        978,  # England
-        999,  # Isreal
-        1020,  # Nederland
-        1062,  # Portugal
-        1083,  # Rossiya
-        1104,  # Lietuva
-        1277,  # Srbija
-        2083,  # Polska
-    ]
-
-    # [ 2, 3, 4, 5, 6, 7, 8, 10, 11, 12, 13, 14, 15, 16, 18, 19, 20, 29, 58]
-    season = 59
+    api = BBApi(username, password, network, store)
 
-    for leagueid in leagueids:
-        team_ids = api.standings(leagueid, season)
-        print(f"Season {season}: teams: {len(team_ids)}")
-        for team_id in team_ids:
-            match_ids = api.schedule(team_id, season)
-            unique_ids.update(match_ids)
-            print(f"LeagueID: {leagueid}, Season {season}: matches: {len(match_ids)}")
+    leagueids = LEAGUE_IDS if leagueid_ is None else [leagueid_]
+    seasons = list(range(season_from, season_to + 1))
 
-    with open("uids-various.txt", "w", encoding='utf-8') as f:
-        for index, uid in enumerate(unique_ids):
-            print(f"Fetch {uid} ({index+1}/{len(unique_ids)})")
-            api.boxscore(uid)
+    prefetcher = Prefetcher(api, workers)
+    unique_ids = prefetcher.run(leagueids, seasons)
 
+    with open("uids-various.txt", "w", encoding="utf-8") as f:
+        for uid in sorted(unique_ids):
             f.write(str(uid) + "\n")
 
-    print(unique_ids)
-    print(len(unique_ids))
+    print(f"Matches: {len(unique_ids)}, failed requests: {len(prefetcher.failed)}")
 
 
 if __name__ == "__main__":
@@ -322,11 +446,40 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--username", required=True)
     parser.add_argument("--password", required=True)
-    parser.add_argument("--leagueid", type=int, required=True)
+    parser.add_argument("--leagueid", type=int, help="Default: all LEAGUE_IDS")
     parser.add_argument("--season-from", type=int, required=True)
     parser.add_argument("--season-to", type=int, required=True)
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE,
+        help="Max requests per second, 0 for no limit",
+    )
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument(
+        "--store",
+        default=DEFAULT_STORE,
+        help="Where responses are cached, see store.py",
+    )
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
+    network = Network(
+        pool_size=args.pool_size,
+        timeout=args.timeout,
+        retries=args.retries,
+        rate=args.rate,
+    )
     prefetch_data(
-        args.username, args.password, args.leagueid, args.season_from, args.season_to
+        args.username,
+        args.password,
+        args.leagueid,
+        args.season_from,
+        args.season_to,
+        network,
+        args.workers,
+        open_store(args.store),
     )
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks over the cached match reports (matches/report_*.xml)."""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import random
+import time
+import tracemalloc
+
+from comments import Comments, PlayerIndex
+from event import convert
+from event_table import report_string
+from game import Game
+from main import parse_report, parse_xml, read_report_dir
+
+
+def load_reports(path: str) -> list[str]:
+    texts = []
+    for _, report in read_report_dir(path):
+        with open(report, mode="r", encoding="utf-8") as f:
+            texts.append(f.read())
+    assert texts, f"No report_<matchid>.xml files in {path}"
+    return texts
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_convert(args) -> None:
+    comments = Comments()
+    matches = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for text in load_reports(args.dir):
+            events, ht, at = parse_xml(text)
+            index = PlayerIndex([ht, at])
+            for event in events:
+                comments.bind(event, [ht, at], index)
+            matches.append(events)
+
+    nevents = sum(len(events) for events in matches)
+
+    def run():
+        for events in matches:
+            convert(events)
+
+    elapsed = best_of(args.repeat, run)
+    print(
+        f"convert: {len(matches)} matches, {nevents} events, "
+        f"{elapsed * 1000:.1f} ms, {nevents / elapsed:.0f} events/s"
+    )
+
+
+def bench_memory(args) -> None:
+    comments = Comments()
+    raw_bytes = base_bytes = nraw = nbase = 0
+
+    for text in load_reports(args.dir):
+        report = report_string(text)
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, ht, at = parse_xml(text)
+
+            tracemalloc.start()
+            events = parse_report(report, at, ht)
+            raw_bytes += tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            index = PlayerIndex([ht, at])
+            for event in events:
+                comments.bind(event, [ht, at], index)
+
+            tracemalloc.start()
+            base_events = convert(events)
+            base_bytes += tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+        nraw += len(events)
+        nbase += len(base_events)
+
+    print(
+        f"memory: {nraw} raw events, {raw_bytes / nraw:.0f} B/event (BBEvent), "
+        f"{nbase} events, {base_bytes / nbase:.0f} B/event (BaseEvent)"
+    )
+
+
+def bench_play(args) -> None:
+    game_args = argparse.Namespace(
+        print_events=False,
+        print_stats=False,
+        save_charts=False,
+        username=None,
+        password=None,
+        verify=False,
+        no_commentary=True,
+    )
+    texts = load_reports(args.dir)
+    nevents = 0
+
+    def run():
+        nonlocal nevents
+        nevents = 0
+        for num, text in enumerate(texts):
+            events, ht, at = parse_xml(text)
+            game = Game(str(num), events, ht, at, game_args, [])
+            game.play()
+            nevents += len(events)
+
+    # Trace output goes to a sink, so this measures formatting and handler
+    # cost rather than the speed of the terminal.
+    with open(os.devnull, "w") as sink:
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter("%(name)s: %(message)s"))
+        root = logging.getLogger()
+        root.addHandler(handler)
+        root.setLevel(args.log_level)
+        try:
+            elapsed = best_of(args.repeat, run)
+        finally:
+            root.removeHandler(handler)
+
+    print(
+        f"play ({args.log_level}): {len(texts)} matches, {nevents} events, "
+        f"{elapsed * 1000:.1f} ms, {nevents / elapsed:.0f} events/s"
+    )
+
+
+def bench_seek(args) -> None:
+    game_args = argparse.Namespace(
+        print_events=False,
+        print_stats=False,
+        save_charts=False,
+        username=None,
+        password=None,
+        verify=False,
+        no_commentary=True,
+    )
+    rng = random.Random(0)
+    games = []
+    for num, text in enumerate(load_reports(args.dir)):
+        events, ht, at = parse_xml(text)
+        game = Game(
+            str(num),
+            events,
+            ht,
+            at,
+            game_args,
+            [],
+            snapshot_every=args.every,
+            snapshot_quarters=True,
+        )
+        game.play()
+        targets = [rng.randrange(len(game.baseevents) + 1) for _ in range(20)]
+        games.append((game, targets))
+    nseeks = sum(len(targets) for _, targets in games)
+
+    def run(from_start):
+        for game, targets in games:
+            for played in targets:
+                if from_start:
+                    game.restore(game.snapshots[0])
+                    while game.played < played:
+                        game.step()
+                else:
+                    game.seek(played)
+
+    replay = best_of(args.repeat, lambda: run(True))
+    seek = best_of(args.repeat, lambda: run(False))
+    nsnapshots = sum(len(game.snapshots) for game, _ in games)
+    print(
+        f"seek (every {args.every} events and quarter): {nseeks} seeks, "
+        f"{nsnapshots} snapshots, replay from start {replay / nseeks * 1e6:.0f} us, "
+        f"from snapshot {seek / nseeks * 1e6:.0f} us per seek"
+    )
+
+
+def bench_save(args) -> None:
+    import match_json
+
+    game_args = argparse.Namespace(
+        print_events=False,
+        print_stats=False,
+        save_charts=False,
+        username=None,
+        password=None,
+        verify=False,
+        no_commentary=False,
+    )
+    games = []
+    for num, text in enumerate(load_reports(args.dir)):
+        events, ht, at = parse_xml(text)
+        game = Game(str(num), events, ht, at, game_args, [])
+        game.play()
+        games.append(game)
+        # Render the comments once, this measures serialization only
+        for event in game.baseevents:
+            event.to_json()
+
+    path = os.path.join(args.out, "bench-save.json")
+    variants = [
+        ("indent=4", 4, match_json.dumps),
+        ("compact json", None, match_json.json_dumps),
+    ]
+    if match_json.orjson is not None:
+        variants.append(("compact orjson", None, match_json.orjson.dumps))
+
+    for name, indent, dumps in variants:
+        size = 0
+
+        def run():
+            nonlocal size
+            size = 0
+            for game in games:
+                game.save(path, indent=indent, dumps=dumps)
+                size += os.path.getsize(path)
+
+        elapsed = best_of(args.repeat, run)
+        print(
+            f"save ({name}): {len(games)} matches, "
+            f"{elapsed / len(games) * 1000:.2f} ms, {size / len(games) / 1024:.0f} KiB "
+            f"per match"
+        )
+    os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dir", default="matches", help="Directory with reports")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--log-level", default="WARNING", help="For play")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    sub.add_parser("convert", help="event.convert throughput").set_defaults(
+        run=bench_convert
+    )
+    sub.add_parser("memory", help="Bytes per decoded event").set_defaults(
+        run=bench_memory
+    )
+    sub.add_parser("play", help="Game.play throughput").set_defaults(run=bench_play)
+    seek = sub.add_parser("seek", help="Game.seek against replaying")
+    seek.add_argument("--every", type=int, default=50, help="Snapshot interval")
+    seek.set_defaults(run=bench_seek)
+    save = sub.add_parser("save", help="Game.save time and output size")
+    save.add_argument("--out", default=".", help="Directory of the scratch file")
+    save.set_defaults(run=bench_save)
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+import unittest
+
+import numpy as np
+
+from event_types import ShotResult
+from stats import Statistic
+
+NUM_PLAYERS = 12
+NUM_STATS = int(Statistic.TeamStats)
+
+
+class _Accumulator:
+    """Collects (match, team, player, stat, value) contributions and sums them
+    with a single bincount per target at the end."""
+
+    def __init__(self, nmatches: int) -> None:
+        self.nmatches = nmatches
+        self.player_index: list[np.ndarray] = []
+        self.player_value: list[np.ndarray] = []
+        self.team_index: list[np.ndarray] = []
+        self.team_value: list[np.ndarray] = []
+
+    def add(self, match, team, stat: Statistic, value, player=None):
+        value = np.broadcast_to(value, match.shape)
+        side = match * 2 + team
+        self.team_index.append(side * NUM_STATS + stat)
+        self.team_value.append(value)
+        if player is not None:
+            # Same wrap around as players[pid - 1] in Team.add_stats
+            slot = (player - 1) % NUM_PLAYERS
+            self.player_index.append((side * NUM_PLAYERS + slot) * NUM_STATS + stat)
+            self.player_value.append(value)
+
+    def result(self) -> tuple[np.ndarray, np.ndarray]:
+        def total(index, value, shape):
+            size = int(np.prod(shape))
+            if not index:
+                return np.zeros(shape, dtype=np.int64)
+            sums = np.bincount(
+                np.concatenate(index), np.concatenate(value), minlength=size
+            )
+            return sums.round().astype(np.int64).reshape(shape)
+
+        players = total(
+            self.player_index,
+            self.player_value,
+            (self.nmatches, 2, NUM_PLAYERS, NUM_STATS),
+        )
+        teams = total(self.team_index, self.team_value, (self.nmatches, 2, NUM_STATS))
+        return players, teams
+
+
+# ShotEvent.has_scored
+SCORED = (ShotResult.SCORED, ShotResult.SCORED_WITH_FOUL, ShotResult.GOALTEND)
+
+
+def concat_tables(tables: list[np.ndarray]):
+    """All events of many matches in one table, the match of each row and
+    the event codes as convert sees them: -100 for flagged rows, 0 for shot
+    results."""
+    ev = np.concatenate(tables)
+    match = np.repeat(np.arange(len(tables)), [len(t) for t in tables])
+    etype = np.where(ev["flag"] > 0, -100, ev["type"]).astype(np.int64)
+    etype[ev["synthetic"]] = 0
+    return ev, match, etype
+
+
+def find_shots(ev: np.ndarray, match: np.ndarray, etype: np.ndarray):
+    """Rows of the events that become a ShotEvent and their ShotResult."""
+    # Shots, each one followed by its result row and then the next event
+    shot = (etype >= 100) & (etype < 500) & ((etype < 210) | (etype > 215))
+    (idx,) = np.nonzero(shot)
+
+    after = idx + 2
+    has_next = after < len(ev)
+    after = np.minimum(after, len(ev) - 1)
+    has_next &= match[after] == match[idx]
+    fouled = has_next & np.isin(etype[after], (504, 507, 508, 509))
+
+    outcome = ev["result"][idx + 1]
+    shot_result = np.full(len(idx), int(ShotResult.MISSED))
+    shot_result[np.isin(outcome, (1, 4))] = ShotResult.SCORED
+    shot_result[outcome == 0] = ShotResult.GOALTEND
+    shot_result[np.isin(outcome, (3, 6))] = ShotResult.BLOCKED
+    shot_result[fouled & (shot_result == ShotResult.SCORED)] = (
+        ShotResult.SCORED_WITH_FOUL
+    )
+    shot_result[fouled & (shot_result == ShotResult.MISSED)] = (
+        ShotResult.MISSED_WITH_FOUL
+    )
+    return idx, shot_result
+
+
+def box_scores(tables: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """Box scores of many matches from their decoded event tables.
+
+    Returns player stats shaped (matches, 2, 12, Statistic.TeamStats) and team
+    stats shaped (matches, 2, Statistic.TeamStats), home team first, in the
+    same order as the tables. Counting stats follow the same rules as
+    Game.play. Seconds on court and plus/minus depend on the lineups and are
+    left at zero.
+    """
+    acc = _Accumulator(len(tables))
+    if not tables:
+        return acc.result()
+
+    ev, match, etype = concat_tables(tables)
+    team = ev["team"].astype(np.int64)
+    other = 1 - team
+    p1 = ev["player1"].astype(np.int64)
+    p2 = ev["player2"].astype(np.int64)
+    result = ev["result"].astype(np.int64)
+
+    idx, shot_result = find_shots(ev, match, etype)
+    m, t, d = match[idx], team[idx], other[idx]
+    attacker, player2 = p1[idx], p2[idx]
+    shot_type = etype[idx]
+
+    raw = result[idx]
+    unknown5 = (raw > 9) & ((raw < 13) | (raw > 14))
+    eresult = np.where(raw > 9, raw - 9, raw)
+
+    scored = np.isin(shot_result, SCORED)
+    is_fouled = np.isin(
+        shot_result, (ShotResult.SCORED_WITH_FOUL, ShotResult.MISSED_WITH_FOUL)
+    )
+    attempt = ~(is_fouled & ~scored)
+    three = (shot_type >= 100) & (shot_type <= 105)
+
+    acc.add(m, t, Statistic.ThreePointsAtt, three & attempt, attacker)
+    acc.add(m, t, Statistic.ThreePointsMade, three & scored, attacker)
+    acc.add(m, t, Statistic.FieldGoalsAtt, attempt, attacker)
+    acc.add(m, t, Statistic.FieldGoalsMade, scored, attacker)
+    acc.add(m, t, Statistic.Points, np.where(scored, 2 + three, 0), attacker)
+
+    blocked = shot_result == ShotResult.BLOCKED
+    acc.add(m[blocked], d[blocked], Statistic.Blocks, 1, player2[blocked])
+
+    # Without an assistant Game.play still credits the team (assistant is None)
+    defended = unknown5 | (eresult <= 3) | (eresult == 6) | (eresult == 7)
+    acc.add(m[defended], t[defended], Statistic.Assists, 1)
+    assisted = ~defended & (player2 != 0)
+    acc.add(m[assisted], t[assisted], Statistic.Assists, 1, player2[assisted])
+
+    def events(*types):
+        sel = np.isin(etype, types)
+        return match[sel], team[sel], other[sel], p1[sel], p2[sel], result[sel]
+
+    m, t, d, a, b, r = events(502)
+    acc.add(m, t, Statistic.FreeThrowsAtt, 1, a)
+    acc.add(m, t, Statistic.FreeThrowsMade, 1, a)
+    acc.add(m, t, Statistic.Points, 1, a)
+    m, t, d, a, b, r = events(503)
+    acc.add(m, t, Statistic.FreeThrowsAtt, 1, a)
+
+    m, t, d, a, b, r = events(931)
+    off = r == 7
+    acc.add(m[off], t[off], Statistic.OffRebounds, 1, a[off])
+    acc.add(m[~off], d[~off], Statistic.DefRebounds, 1, a[~off])
+
+    m, t, d, a, b, r = events(801, 802, 810, 812)
+    acc.add(m, t, Statistic.Turnovers, 1, a)
+    m, t, d, a, b, r = events(807, 808)
+    acc.add(m, t, Statistic.Turnovers, 1, b)
+    acc.add(m, d, Statistic.Steals, 1, a)
+    m, t, d, a, b, r = events(804)
+    acc.add(m, t, Statistic.Turnovers, 1)
+
+    m, t, d, a, b, r = events(803)
+    acc.add(m, t, Statistic.Turnovers, 1, a)
+    acc.add(m, t, Statistic.Fouls, 1, a)
+    m, t, d, a, b, r = events(504, 505, 508)
+    acc.add(m, d, Statistic.Fouls, 1, b)
+
+    m, t, d, a, b, r = events(706)
+    acc.add(m[r == 0], t[r == 0], Statistic.Timeouts30, 1)
+    acc.add(m[r != 0], t[r != 0], Statistic.Timeouts60, 1)
+
+    return acc.result()
+
+
+def totals_by_id(stats: np.ndarray, ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Sum stats rows sharing the same player or team ID.
+
+    `ids` has the leading shape of `stats`, e.g. (matches, 2, 12) roster IDs for
+    player stats. ID 0 (empty roster slots) is dropped.
+    """
+    ids = ids.reshape(-1)
+    rows = stats.reshape(len(ids), -1)
+    keep = ids != 0
+
+    unique, inverse = np.unique(ids[keep], return_inverse=True)
+    totals = np.zeros((len(unique), rows.shape[1]), dtype=np.int64)
+    np.add.at(totals, inverse, rows[keep])
+    return unique, totals
+
+
+CHECKED = [
+    Statistic.Points,
+    Statistic.FieldGoalsAtt,
+    Statistic.FieldGoalsMade,
+    Statistic.ThreePointsAtt,
+    Statistic.ThreePointsMade,
+    Statistic.FreeThrowsAtt,
+    Statistic.FreeThrowsMade,
+    Statistic.OffRebounds,
+    Statistic.DefRebounds,
+    Statistic.Assists,
+    Statistic.Turnovers,
+    Statistic.Steals,
+    Statistic.Blocks,
+    Statistic.Fouls,
+    Statistic.Timeouts30,
+    Statistic.Timeouts60,
+]
+
+
+class TestBoxScores(unittest.TestCase):
+    # Rosters, starters and the first 26 events of match 123786926. Event 18
+    # is a home miss defended by player 4.
+    REPORT = (
+        "2259528524058561243009943975062842965855437572994454951746135758"
+        "4652133546521346477572895181464150581999508481775116737351806024"
+        "5180603351922806519228075192280800264845002648440026484300264842"
+        "2578B34578"
+        "093390383000300030203403B8002300060809901800023000711024007300360010"
+        "18099003000360011080790238005600141411504540065001719317038800650020"
+        "14092038700670023193180258006700260405503850090002909318028300900032"
+        "12035048401010035193170138010100381409004380103004108089014701240044"
+        "14114027801310047180990080013100480201201B4015500510504900B401550054"
+        "0502904B0015500570502902B00155006012032044B0170006319318057801700066"
+        "0201504250181006909318018301810072"
+    )
+
+    def test_same_as_game_play(self):
+        import argparse
+
+        from event_table import decode_events, decode_roster, to_bbevents
+        from game import Game
+        from xml_readers import make_team
+
+        table = decode_events(self.REPORT)
+        home_ids, away_ids, home_starters, away_starters = decode_roster(self.REPORT)
+        ht, at = make_team({}, []), make_team({}, [])
+        for team, ids, starters in (
+            (ht, home_ids, home_starters),
+            (at, away_ids, away_starters),
+        ):
+            for player, id in zip(team.players, ids.tolist()):
+                player.id = id
+            for pos, index in enumerate(starters.tolist()):
+                team.set_starter(index, pos)
+
+        game_args = argparse.Namespace(
+            print_events=False,
+            print_stats=False,
+            save_charts=False,
+            username=None,
+            password=None,
+            verify=False,
+            no_commentary=True,
+        )
+        game = Game("test", to_bbevents(table), ht, at, game_args, [])
+        game.play()
+
+        # Twice, so the second match's rows have to land in their own slots
+        players, teams = box_scores([table, table])
+        for num in range(2):
+            for side, team in enumerate(game.teams):
+                for stat in CHECKED:
+                    self.assertEqual(
+                        teams[num, side, stat], team.stats.full.sheet[stat], stat
+                    )
+                    self.assertEqual(
+                        players[num, side, :, stat].tolist(),
+                        [player.stats.full.sheet[stat] for player in team.players],
+                        stat,
+                    )
+
+    def test_defended_shot_assist(self):
+        from event_table import decode_events
+
+        players, teams = box_scores([decode_events(self.REPORT)])
+        # Credited to the home team, but to none of its players
+        self.assertEqual(
+            teams[0, 0, Statistic.Assists],
+            players[0, 0, :, Statistic.Assists].sum() + 1,
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+    import contextlib
+    import io
+    import time
+    from event_table import decode_events, decode_roster, report_string
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("reports", nargs="+", help="report_<matchid>.xml files")
+    parser.add_argument(
+        "--verify", action="store_true", help="Compare totals with Game.play"
+    )
+    args = parser.parse_args()
+
+    reports = []
+    for path in args.reports:
+        with open(path, mode="r", encoding="utf-8") as f:
+            reports.append(f.read())
+
+    start = time.perf_counter()
+    strings = [report_string(text) for text in reports]
+    tables = [decode_events(report) for report in strings]
+    players, teams = box_scores(tables)
+    rosters = np.array([np.stack(decode_roster(report)[:2]) for report in strings])
+    ids, totals = totals_by_id(players, rosters)
+    elapsed = time.perf_counter() - start
+
+    nevents = sum(len(t) for t in tables)
+    print(
+        f"{len(tables)} matches, {nevents} events, {len(ids)} players "
+        f"in {elapsed:.3f}s ({nevents / max(elapsed, 1e-9):.0f} events/s)"
+    )
+
+    if args.verify:
+        from main import parse_xml
+        from game import Game
+
+        game_args = argparse.Namespace(
+            print_events=False,
+            print_stats=False,
+            save_charts=False,
+            username=None,
+            password=None,
+            verify=False,
+            no_commentary=True,
+        )
+
+        mismatches = 0
+        for num, (path, text) in enumerate(zip(args.reports, reports)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                events, ht, at = parse_xml(text)
+                game = Game(path, events, ht, at, game_args, [])
+                game.play()
+
+            for side, team in enumerate(game.teams):
+                for stat in CHECKED:
+                    if team.stats.full.sheet[stat] != teams[num, side, stat]:
+                        print(f"{path}: {team.name} {stat.name} differs")
+                        mismatches += 1
+                    for slot, player in enumerate(team.players):
+                        if (
+                            player.stats.full.sheet[stat]
+                            != players[num, side, slot, stat]
+                        ):
+                            print(f"{path}: {player.name} {stat.name} differs")
+                            mismatches += 1
+
+        print(f"Verified against Game.play: {mismatches} mismatches")
@@ -10,76 +10,152 @@ REGULAR_TIME = QUARTER_TIME * NUM_QUARTERS
 OVER_TIME = MINUTES_IN_OVER_TIME * MINUTE
 
 
+# Tables below cover regulation plus this many overtimes, clocks past that
+# (or before the tip-off) are computed instead of looked up.
+MAX_OVERTIMES = 10
+CLOCK_LIMIT = REGULAR_TIME + MAX_OVERTIMES * OVER_TIME
+
+
+def is_overtime(clock: int) -> bool:
+    return clock >= REGULAR_TIME
+
+
+def is_over(clock: int) -> bool:
+    return clock == REGULAR_TIME or (
+        clock > REGULAR_TIME and (clock - REGULAR_TIME) % OVER_TIME == 0
+    )
+
+
+def _is_break(clock: int) -> bool:
+    return clock != 0 and (
+        (clock <= REGULAR_TIME and clock % QUARTER_TIME == 0)
+        or (is_overtime(clock) and (clock - REGULAR_TIME) % OVER_TIME == 0)
+    )
+
+
+def is_clutch(clock: int) -> bool:
+    return clock >= (REGULAR_TIME - OVER_TIME)
+
+
+def _till_break(clock: int) -> int:
+    if clock < REGULAR_TIME:
+        return QUARTER_TIME - (clock % QUARTER_TIME)
+    else:
+        return OVER_TIME - ((clock - REGULAR_TIME) % OVER_TIME)
+
+
+def _quarter(clock: int) -> int:
+    if clock < REGULAR_TIME:
+        return clock // QUARTER_TIME + 1
+    return NUM_QUARTERS + (clock - REGULAR_TIME) // OVER_TIME + 1
+
+
+def minutes(clock: int, quarter=1) -> int:
+    if clock <= REGULAR_TIME and quarter <= NUM_QUARTERS:
+        if clock > 0 and clock % QUARTER_TIME == 0 and clock // QUARTER_TIME == quarter:
+            return 0
+
+        return MINUTES_IN_QUARTER_TIME - math.ceil((clock % QUARTER_TIME) / 60.0)
+    else:
+        if (clock - REGULAR_TIME) % OVER_TIME == 0 and (
+            clock - REGULAR_TIME
+        ) // OVER_TIME == quarter - NUM_QUARTERS:
+            return 0
+
+        return MINUTES_IN_OVER_TIME - math.ceil(
+            (clock - REGULAR_TIME) % OVER_TIME / 60.0
+        )
+
+
+def seconds(clock: int) -> int:
+    if clock % MINUTE == 0:
+        return 0
+
+    return MINUTE - (clock % MINUTE)
+
+
+def _to_string(clock: int, quarter=1) -> str:
+    mins = minutes(clock, quarter)
+    secs = seconds(clock)
+    string = ""
+    if mins <= 9:
+        string += "0"
+
+    string += str(mins)
+    string += ":"
+    if secs <= 9:
+        string += "0"
+
+    string += str(secs)
+    return string
+
+
+TILL_BREAK = [_till_break(clock) for clock in range(CLOCK_LIMIT + 1)]
+IS_BREAK = [_is_break(clock) for clock in range(CLOCK_LIMIT + 1)]
+# Quarter a clock is in, a break starts the next one (overtimes are 5, 6...)
+QUARTERS = [_quarter(clock) for clock in range(CLOCK_LIMIT + 1)]
+# Clock as shown during the quarter it is in, see to_string
+CLOCK_STRINGS = [_to_string(clock, QUARTERS[clock]) for clock in range(CLOCK_LIMIT + 1)]
+
+
+def till_break(clock: int) -> int:
+    """Seconds until the end of the quarter or overtime clock is in."""
+    if 0 <= clock <= CLOCK_LIMIT:
+        return TILL_BREAK[clock]
+    return _till_break(clock)
+
+
+def is_break(clock: int) -> bool:
+    if 0 <= clock <= CLOCK_LIMIT:
+        return IS_BREAK[clock]
+    return _is_break(clock)
+
+
+def quarter_of(clock: int) -> int:
+    if 0 <= clock <= CLOCK_LIMIT:
+        return QUARTERS[clock]
+    return _quarter(clock)
+
+
+def to_string(clock: int, quarter=1) -> str:
+    """Remaining time of the quarter as MM:SS. At a break the clock shows
+    00:00 in the quarter that ends and the full time in the next one."""
+    if 0 <= clock <= CLOCK_LIMIT:
+        if quarter == QUARTERS[clock]:
+            return CLOCK_STRINGS[clock]
+        if quarter == QUARTERS[clock] - 1 and IS_BREAK[clock]:
+            return "00:00"
+    return _to_string(clock, quarter)
+
+
 class Gameclock:
     def __init__(self, clock: int, quarter=1) -> None:
         self.clock = clock
         self.quarter = quarter
 
     def is_overtime(self) -> bool:
-        return self.clock >= REGULAR_TIME
+        return is_overtime(self.clock)
 
     def is_over(self) -> bool:
-        return self.clock == REGULAR_TIME or (
-            self.clock > REGULAR_TIME and (self.clock - REGULAR_TIME) % OVER_TIME == 0
-        )
+        return is_over(self.clock)
 
     def is_break(self) -> bool:
-        return self.clock != 0 and (
-            (self.clock <= REGULAR_TIME and self.clock % QUARTER_TIME == 0)
-            or (self.is_overtime() and (self.clock - REGULAR_TIME) % OVER_TIME == 0)
-        )
+        return is_break(self.clock)
 
     def is_clutch(self) -> bool:
-        return self.clock >= (REGULAR_TIME - OVER_TIME)
+        return is_clutch(self.clock)
 
     def till_break(self) -> int:
-        if self.clock < REGULAR_TIME:
-            return QUARTER_TIME - (self.clock % QUARTER_TIME)
-        else:
-            return OVER_TIME - ((self.clock - REGULAR_TIME) % OVER_TIME)
+        return till_break(self.clock)
 
     def minutes(self) -> int:
-        if self.clock <= REGULAR_TIME and self.quarter <= NUM_QUARTERS:
-            if (
-                self.clock > 0
-                and self.clock % QUARTER_TIME == 0
-                and self.clock // QUARTER_TIME == self.quarter
-            ):
-                return 0
-
-            return MINUTES_IN_QUARTER_TIME - math.ceil(
-                (self.clock % QUARTER_TIME) / 60.0
-            )
-        else:
-            if (self.clock - REGULAR_TIME) % OVER_TIME == 0 and (
-                self.clock - REGULAR_TIME
-            ) // OVER_TIME == self.quarter - NUM_QUARTERS:
-                return 0
-
-            return MINUTES_IN_OVER_TIME - math.ceil(
-                (self.clock - REGULAR_TIME) % OVER_TIME / 60.0
-            )
+        return minutes(self.clock, self.quarter)
 
     def seconds(self) -> int:
-        if self.clock % MINUTE == 0:
-            return 0
-
-        return MINUTE - (self.clock % MINUTE)
+        return seconds(self.clock)
 
     def to_string(self):
-        minutes = self.minutes()
-        seconds = self.seconds()
-        string = ""
-        if minutes <= 9:
-            string += "0"
-
-        string += str(minutes)
-        string += ":"
-        if seconds <= 9:
-            string += "0"
-
-        string += str(seconds)
-        return string
+        return to_string(self.clock, self.quarter)
 
 
 class TestGameclock(unittest.TestCase):
@@ -97,5 +173,23 @@ class TestGameclock(unittest.TestCase):
         self.assertEqual(Gameclock(clock=720 * 4 + 300, quarter=6).to_string(), "05:00")
 
 
+class TestTables(unittest.TestCase):
+    def test_tables(self):
+        # Every clock and quarter the tables answer for, and some they don't
+        for clock in range(-QUARTER_TIME, CLOCK_LIMIT + QUARTER_TIME):
+            self.assertEqual(till_break(clock), _till_break(clock))
+            self.assertEqual(is_break(clock), _is_break(clock))
+            self.assertEqual(quarter_of(clock), _quarter(clock))
+            for quarter in range(1, NUM_QUARTERS + MAX_OVERTIMES + 3):
+                self.assertEqual(to_string(clock, quarter), _to_string(clock, quarter))
+
+    def test_quarter_of(self):
+        self.assertEqual(quarter_of(0), 1)
+        self.assertEqual(quarter_of(719), 1)
+        self.assertEqual(quarter_of(720), 2)
+        self.assertEqual(quarter_of(REGULAR_TIME), 5)
+        self.assertEqual(quarter_of(REGULAR_TIME + OVER_TIME), 6)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,27 +1,174 @@
+import hashlib
+import logging
+import os
+import pickle
+import re
 import xml.etree.ElementTree as XML
+from typing import Optional
 from event import *
 
+log = logging.getLogger(__name__)
+
+PLAYER1 = 0
+PLAYER2 = 1
+TEAM1 = 2
+EVENT1 = 3
+
+SLOT_PATTERN = re.compile(r"\$(player1|player2|team1|event1)\$")
+SLOT_NAMES = {"player1": PLAYER1, "player2": PLAYER2, "team1": TEAM1, "event1": EVENT1}
+
+# Bump whenever the layout of the cached tables changes.
+CACHE_VERSION = 1
+
+
+class Template:
+    """Commentary text split into literal parts with slot indices between them."""
+
+    __slots__ = ("parts", "slots")
+
+    def __init__(self, parts: tuple[str, ...], slots: tuple[int, ...]) -> None:
+        self.parts = parts
+        self.slots = slots
+
+    @staticmethod
+    def compile(text: str) -> "Template":
+        tokens = SLOT_PATTERN.split(text)
+        return Template(
+            tuple(tokens[0::2]), tuple(SLOT_NAMES[name] for name in tokens[1::2])
+        )
+
+    def splice(self, event: "Template") -> "Template":
+        """Template with every $event1$ replaced by the given template."""
+        parts = [self.parts[0]]
+        slots = []
+        for slot, part in zip(self.slots, self.parts[1:]):
+            if slot == EVENT1:
+                parts[-1] += event.parts[0]
+                parts.extend(event.parts[1:])
+                slots.extend(event.slots)
+                parts[-1] += part
+            else:
+                slots.append(slot)
+                parts.append(part)
+        return Template(tuple(parts), tuple(slots))
+
+    def render(self, values: list[str]) -> str:
+        parts = self.parts
+        if not self.slots:
+            return parts[0]
+
+        out = [parts[0]]
+        for slot, part in zip(self.slots, parts[1:]):
+            out.append(values[slot])
+            out.append(part)
+        return "".join(out)
+
+
+def parse_commentary(path: str) -> dict[str, dict[int, str]]:
+    comments: dict[str, dict[int, str]] = {}
+
+    tree = XML.parse(path)
+    root = tree.getroot()
+
+    for child in root:
+        tag = child.tag
+        if tag == "Events":
+            for event in child:
+                key = event.tag[0:-2]
+                ty = int(event.tag[-1])
+                val = event.text.strip() if event.text else ""
+
+                if key in comments:
+                    comments[key][ty] = val
+                else:
+                    comments[key] = {ty: val}
+
+    return comments
+
+
+# Commentary tables already loaded by this process, by XML path.
+loaded_tables: dict[str, tuple[dict, dict]] = {}
+
+
+def load_commentary(
+    path: str,
+) -> tuple[dict[str, dict[int, str]], dict[str, dict[int, Template]]]:
+    """Raw and compiled commentary tables of an XML file.
+
+    Compiled tables are pickled next to the XML file, keyed by its size and
+    mtime, and when those changed by the SHA-1 of its content.
+    """
+    if path in loaded_tables:
+        return loaded_tables[path]
+
+    cache = path + ".cache"
+    stat = os.stat(path)
+    quick_key = (CACHE_VERSION, stat.st_size, stat.st_mtime_ns)
+
+    try:
+        with open(cache, "rb") as f:
+            cached_quick_key, cached_key, tables = pickle.load(f)
+    except Exception:
+        # Unreadable, truncated or pickled against classes that have changed
+        # since, just rebuild it
+        cached_quick_key, cached_key, tables = None, None, None
+
+    if cached_quick_key != quick_key:
+        with open(path, "rb") as f:
+            key = (CACHE_VERSION, hashlib.sha1(f.read()).hexdigest())
+
+        if cached_key != key:
+            comments = parse_commentary(path)
+            templates = {
+                name: {ty: Template.compile(text) for ty, text in variants.items()}
+                for name, variants in comments.items()
+            }
+            tables = (comments, templates)
+
+        try:
+            tmp = f"{cache}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump((quick_key, key, tables), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cache)
+        except OSError:
+            # Read-only checkout, just go without the cache
+            pass
+
+    loaded_tables[path] = tables
+    return tables
+
+
+class PlayerIndex:
+    """Commentary labels of all players of a game, e.g. "J. Smith (H)".
+
+    Built once the roster IDs are known. The side is looked up by player ID,
+    home team first, the same way for players sharing an ID (empty roster
+    slots).
+    """
+
+    def __init__(self, teams: list[Team]) -> None:
+        self.teams = teams
+        self.sides: dict[int, str] = {}
+        for side, team in zip(("(H)", "(A)"), teams):
+            for player in team.players:
+                self.sides.setdefault(player.id, side)
+
+        self.labels: dict[Player, str] = {}
+
+    def label(self, player: Player) -> str:
+        label = self.labels.get(player)
+        if label is None:
+            label = f"{player.get_shortened_name()} {self.sides.get(player.id)}"
+            self.labels[player] = label
+        return label
+
 
 class Comments:
-    def __init__(self) -> None:
-        self.comments: dict[str, dict[int, str]] = {}
-
-        input = "commentary-en.xml"
-        tree = XML.parse(input)
-        root = tree.getroot()
-
-        for child in root:
-            tag = child.tag
-            if tag == "Events":
-                for event in child:
-                    key = event.tag[0:-2]
-                    ty = int(event.tag[-1])
-                    val = event.text.strip() if event.text else ""
-
-                    if key in self.comments:
-                        self.comments[key][ty] = val
-                    else:
-                        self.comments[key] = {ty: val}
+    def __init__(self, input: str = "commentary-en.xml") -> None:
+        self.comments: dict[str, dict[int, str]]
+        self.templates: dict[str, dict[int, Template]]
+        self.comments, self.templates = load_commentary(input)
+        self.spliced: dict[tuple[Template, Template], Template] = {}
 
     def get_text2(self, data: str) -> str:
         loc2: int = 0
@@ -64,9 +211,8 @@ class Comments:
             return self.comments[key][ty1 * 10]
         return self.comments[key][0]
 
-    def get_text(self, data: str) -> str:
+    def get_text(self, data: str) -> Template:
         loc2 = 0
-        loc3 = ""
         loc4 = ""
         loc5 = 0
         loc6 = ""
@@ -75,12 +221,13 @@ class Comments:
         evar1 = int(data[4], 16)  # ???
         event_variation = int(data[5], 16)
 
-        if __debug__:
-            print(
-                "\nRaw:\n\tprefix: {}\n\tresult: {}\n\tloc9: {}\n\tvar: {}".format(
-                    event_prefix, event_result, evar1, event_variation
-                )
-            )
+        log.debug(
+            "Raw: prefix: %s, result: %s, loc9: %s, var: %s",
+            event_prefix,
+            event_result,
+            evar1,
+            event_variation,
+        )
 
         # Dunk
         if data[0:3] == "401" and event_variation == 3 and event_result != 4:
@@ -101,28 +248,29 @@ class Comments:
 
         if event_prefix == 1 or event_prefix == 2 or event_prefix == 4:
             if loc5 == 1:
-                loc3 = self.get_variant("e0003", event_variation)
+                outer = self.get_variant("e0003", event_variation)
             elif event_result <= 3 or event_result == 7 or event_result == 6:
-                loc3 = self.get_variant("e0001", event_variation)
+                outer = self.get_variant("e0001", event_variation)
             else:
-                loc3 = self.get_variant("e0002", event_variation)
+                outer = self.get_variant("e0002", event_variation)
 
-            loc3 = loc3.replace(
-                "$event1$", self.get_variant(loc6 + "x", event_variation)
-            )
+            inner = self.get_variant(loc6 + "x", event_variation)
+            template = self.spliced.get((outer, inner))
+            if template is None:
+                template = outer.splice(inner)
+                self.spliced[(outer, inner)] = template
         elif event_prefix == 0:
             loc2 = 1 if event_result == 1 or event_result == 4 else 0
             if event_result == 0:
                 loc2 = 2  # Goaltend
             elif event_result == 3 or event_result == 6:
                 loc2 = 3  # Blocked
-                loc3 = self.comments["e0000"][loc2]
-            loc3 = self.comments["e0000"][loc2]
+            template = self.templates["e0000"][loc2]
         else:
             loc4 = loc6 + str(event_result)
-            loc3 = self.get_variant(loc4, event_variation)
+            template = self.get_variant(loc4, event_variation)
 
-        return loc3
+        return template
 
     def get_actors(self, event: BBEvent, teams: list[Team]):
         loc3 = event.result % 16
@@ -140,10 +288,13 @@ class Comments:
         event_prefix = event.type // 100
         event_type = event.type
 
-        if __debug__:
-            print(
-                f"RAW2:\n\tloc3: {loc3}\n\tloc10: {loc10}\n\ttype: {event_type}\n\tprefix: {event_prefix}"
-            )
+        log.debug(
+            "RAW2: loc3: %s, loc10: %s, type: %s, prefix: %s",
+            loc3,
+            loc10,
+            event_type,
+            event_prefix,
+        )
 
         player_primary = teams[team_att].players[event.player1 - 1]
         player_secondary = teams[team_def].players[event.player2 - 1]
@@ -198,52 +349,47 @@ class Comments:
 
         return None, "Invalid", None, "Invalid"
 
-    def get_comment(self, event: BBEvent, teams: list[Team]) -> str:
-        text = self.get_text(event.data)
+    def bind(
+        self, event: BBEvent, teams: list[Team], index: Optional["PlayerIndex"] = None
+    ) -> None:
+        """Resolve the actors of an event, its comment is rendered on demand."""
         p1, t1, p2, t2 = self.get_actors(event, teams)
         event.player1obj = p1
         event.player2obj = p2
-
-        if __debug__:
-            print(event.to_string(p1, p2))
-
-        if "$player1$" in text:
-            loc = None
-            for p in teams[0].players:
-                if p.id == p1.id:
-                    loc = "(H)"
-                    break
-            if loc is None:
-                for p in teams[1].players:
-                    if p.id == p1.id:
-                        loc = "(A)"
-                        break
-            text = text.replace("$player1$", f"{p1.get_shortened_name()} {loc}")
-
-        if "$player2$" in text:
-            loc = None
-            for p in teams[0].players:
-                if p.id == p2.id:
-                    loc = "(H)"
-                    break
-            if loc is None:
-                for p in teams[1].players:
-                    if p.id == p2.id:
-                        loc = "(A)"
-                        break
-            text = text.replace("$player2$", f"{p2.get_shortened_name()} {loc}")
-
-        if "$team1$" in text:
-            text = text.replace("$team1$", teams[t1].name)
-
+        if index is None:
+            index = PlayerIndex(teams)
+        event.commentary = (self, index, t1)
+
+    def render(self, event: BBEvent, index: "PlayerIndex", t1) -> str:
+        template = self.get_text(event.data)
+        p1 = event.player1obj
+        p2 = event.player2obj
+
+        values = ["", "", "", ""]
+        slots = template.slots
+
+        if PLAYER1 in slots:
+            values[PLAYER1] = index.label(p1)
+        if PLAYER2 in slots:
+            values[PLAYER2] = index.label(p2)
+        if TEAM1 in slots:
+            values[TEAM1] = index.teams[t1].name
+
+        text = template.render(values)
         event.comment = text
-        if __debug__:
-            print(event.to_string(p1, p2))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(event.to_string(p1, p2))
 
         return text
 
-    def get_variant(self, key: str, ty: int) -> str:
-        if ty in self.comments[key]:
-            return self.comments[key][ty]
+    def get_comment(
+        self, event: BBEvent, teams: list[Team], index: Optional["PlayerIndex"] = None
+    ) -> str:
+        self.bind(event, teams, index)
+        return event.comment
+
+    def get_variant(self, key: str, ty: int) -> Template:
+        if ty in self.templates[key]:
+            return self.templates[key][ty]
         else:
-            return self.comments[key][0]
+            return self.templates[key][0]
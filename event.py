@@ -1,14 +1,22 @@
 from enum import IntEnum, auto
+from functools import partial
+from typing import Callable, Optional
 from venv import create
 
-from clocks import Gameclock
 from team import Team, opponent
 from player import Player
+import logging
 import math
+
+import numpy as np
 from event_types import *
 
+log = logging.getLogger(__name__)
+
 
 class Clocks:
+    __slots__ = ("game", "real", "shot")
+
     def __init__(self, game: int, real: int, shot: int) -> None:
         self.game = game
         self.real = real
@@ -16,29 +24,52 @@ class Clocks:
 
 
 class ShotPos:
+    __slots__ = ("x", "y")
+
     def __init__(self, posx: int, posy: int) -> None:
         self.x = posx
         self.y = posy
 
 
 class BaseEvent:
-    def __init__(self, comments: list[str], clocks: Clocks) -> None:
-        self.comments = comments
+    # Slotted, full season replays keep hundreds of thousands of events alive
+    __slots__ = ("sources", "gameclock", "realclock", "shotclock")
+
+    def __init__(self, sources: list["BBEvent"], clocks: Clocks) -> None:
+        # Raw events this one was built from, their comments are rendered
+        # only when asked for.
+        self.sources = sources
         self.gameclock = clocks.game
         self.realclock = clocks.real
         self.shotclock = clocks.shot
 
+    @property
+    def comments(self) -> list[str]:
+        return [source.comment for source in self.sources]
+
     def patch_shotclock(self, clock):
         self.shotclock = clock
 
-    def to_json(self):
+    def to_json(self, comments=True):
         return None
 
 
 class ShotEvent(BaseEvent):
+    __slots__ = (
+        "shot_type",
+        "shot_result",
+        "attacker",
+        "defender",
+        "assistant",
+        "att_team",
+        "def_team",
+        "shot_x",
+        "shot_y",
+    )
+
     def __init__(
         self,
-        comments: list[str],
+        sources: list["BBEvent"],
         clocks: Clocks,
         shot_type: ShotType,
         shot_result: ShotResult,
@@ -49,7 +80,7 @@ class ShotEvent(BaseEvent):
         def_team: int,
         shot_pos: ShotPos,
     ) -> None:
-        super().__init__(comments, clocks)
+        super().__init__(sources, clocks)
         self.shot_type = shot_type
         self.shot_result = shot_result
         self.attacker = attacker
@@ -57,13 +88,18 @@ class ShotEvent(BaseEvent):
         self.assistant = assistant
         self.att_team = att_team
         self.def_team = def_team
-        self.shot_pos = shot_pos
+        self.shot_x = shot_pos.x
+        self.shot_y = shot_pos.y
 
-    def to_json(self):
-        return {
+    @property
+    def shot_pos(self) -> ShotPos:
+        return ShotPos(self.shot_x, self.shot_y)
+
+    def to_json(self, comments=True):
+        fields = {
             "event_type": "shot",
-            "shot_type": str(self.shot_type),
-            "shot_result": str(self.shot_result),
+            "shot_type": SHOT_TYPE_NAMES[self.shot_type],
+            "shot_result": SHOT_RESULT_NAMES[self.shot_result],
             "attacking_team": self.att_team,
             "attacker": self.attacker,
             "defending_team": self.def_team,
@@ -71,10 +107,12 @@ class ShotEvent(BaseEvent):
             "assistant": self.assistant,
             "gameclock": self.gameclock,
             "shotclock": self.shotclock,
-            "shot_pos_x": self.shot_pos.x,
-            "shot_pos_y": self.shot_pos.y,
-            "comments": self.comments,
+            "shot_pos_x": self.shot_x,
+            "shot_pos_y": self.shot_y,
         }
+        if comments:
+            fields["comments"] = self.comments
+        return fields
 
     def is_3pt(self):
         return self.shot_type in (
@@ -117,9 +155,11 @@ class ShotEvent(BaseEvent):
 
 
 class InterruptEvent(BaseEvent):
+    __slots__ = ("interrupt_type", "attacker", "defender", "att_team", "def_team")
+
     def __init__(
         self,
-        comments: list[str],
+        sources: list["BBEvent"],
         clocks: Clocks,
         interrupt_type: InterruptType,
         attacker: int,
@@ -127,31 +167,42 @@ class InterruptEvent(BaseEvent):
         att_team: int,
         def_team: int,
     ) -> None:
-        super().__init__(comments, clocks)
+        super().__init__(sources, clocks)
         self.interrupt_type = interrupt_type
         self.attacker = attacker
         self.defender = defender
         self.att_team = att_team
         self.def_team = def_team
 
-    def to_json(self):
-        return {
+    def to_json(self, comments=True):
+        fields = {
             "event_type": "interrupt",
-            "interrupt_type": str(self.interrupt_type),
+            "interrupt_type": INTERRUPT_TYPE_NAMES[self.interrupt_type],
             "attacking_team": self.att_team,
             "attacker": self.attacker,
             "defending_team": self.def_team,
             "defender": self.defender,
             "gameclock": self.gameclock,
             "shotclock": self.shotclock,
-            "comments": self.comments,
         }
+        if comments:
+            fields["comments"] = self.comments
+        return fields
 
 
 class FoulEvent(BaseEvent):
+    __slots__ = (
+        "foul_type",
+        "attacker",
+        "defender",
+        "att_team",
+        "def_team",
+        "flagrant",
+    )
+
     def __init__(
         self,
-        comments: list[str],
+        sources: list["BBEvent"],
         clocks: Clocks,
         foul_type: FoulType,
         attacker: int,
@@ -160,7 +211,7 @@ class FoulEvent(BaseEvent):
         def_team: int,
         flagrant: int,
     ) -> None:
-        super().__init__(comments, clocks)
+        super().__init__(sources, clocks)
         self.foul_type = foul_type
         self.attacker = attacker
         self.defender = defender
@@ -168,10 +219,10 @@ class FoulEvent(BaseEvent):
         self.def_team = def_team
         self.flagrant = flagrant
 
-    def to_json(self):
-        return {
+    def to_json(self, comments=True):
+        fields = {
             "event_type": "foul",
-            "foul_type": str(self.foul_type),
+            "foul_type": FOUL_TYPE_NAMES[self.foul_type],
             "flagrant": self.flagrant,
             "attacking_team": self.att_team,
             "attacker": self.attacker,
@@ -179,14 +230,18 @@ class FoulEvent(BaseEvent):
             "defender": self.defender,
             "gameclock": self.gameclock,
             "shotclock": self.shotclock,
-            "comments": self.comments,
         }
+        if comments:
+            fields["comments"] = self.comments
+        return fields
 
 
 class ReboundEvent(BaseEvent):
+    __slots__ = ("rebound_type", "attacker", "defender", "att_team", "def_team")
+
     def __init__(
         self,
-        comments: list[str],
+        sources: list["BBEvent"],
         clocks: Clocks,
         rebound_type: ReboundType,
         attacker: int,
@@ -194,25 +249,27 @@ class ReboundEvent(BaseEvent):
         att_team: int,
         def_team: int,
     ) -> None:
-        super().__init__(comments, clocks)
+        super().__init__(sources, clocks)
         self.rebound_type = rebound_type
         self.attacker = attacker
         self.defender = defender
         self.att_team = att_team
         self.def_team = def_team
 
-    def to_json(self):
-        return {
+    def to_json(self, comments=True):
+        fields = {
             "event_type": "rebound",
-            "rebound_type": str(self.rebound_type),
+            "rebound_type": REBOUND_TYPE_NAMES[self.rebound_type],
             "attacking_team": self.att_team,
             "attacker": self.attacker,
             "defending_team": self.def_team,
             "defender": self.defender,
             "gameclock": self.gameclock,
             "shotclock": self.shotclock,
-            "comments": self.comments,
         }
+        if comments:
+            fields["comments"] = self.comments
+        return fields
 
     def is_rebound(self):
         return self.rebound_type not in (
@@ -228,40 +285,52 @@ class ReboundEvent(BaseEvent):
 
 
 class FreeThrowEvent(BaseEvent):
+    __slots__ = ("free_throw_type", "shot_result", "attacker", "att_team")
+
     def __init__(
         self,
-        comments: list[str],
+        sources: list["BBEvent"],
         clocks: Clocks,
         free_throw_type: FreeThrowType,
         shot_result: ShotResult,
         attacker: int,
         att_team: int,
     ) -> None:
-        super().__init__(comments, clocks)
+        super().__init__(sources, clocks)
         self.free_throw_type = free_throw_type
         self.shot_result = shot_result
         self.attacker = attacker
         self.att_team = att_team
 
-    def to_json(self):
-        return {
+    def to_json(self, comments=True):
+        fields = {
             "event_type": "free_throw",
-            "free_throw_type": str(self.free_throw_type),
+            "free_throw_type": FREE_THROW_TYPE_NAMES[self.free_throw_type],
             "attacking_team": self.att_team,
             "attacker": self.attacker,
             "gameclock": self.gameclock,
             "shotclock": self.shotclock,
-            "comments": self.comments,
         }
+        if comments:
+            fields["comments"] = self.comments
+        return fields
 
     def has_scored(self):
         return self.shot_result == ShotResult.SCORED
 
 
 class InjuryEvent(BaseEvent):
+    __slots__ = (
+        "injury_type",
+        "injured_player",
+        "causedby_player",
+        "injured_team",
+        "causedby_team",
+    )
+
     def __init__(
         self,
-        comments: list[str],
+        sources: list["BBEvent"],
         clocks: Clocks,
         injury_type: InjuryType,
         injured_player: int,
@@ -269,73 +338,97 @@ class InjuryEvent(BaseEvent):
         injured_team: int,
         causedby_team: int,
     ) -> None:
-        super().__init__(comments, clocks)
+        super().__init__(sources, clocks)
         self.injury_type = injury_type
         self.injured_player = injured_player
         self.causedby_player = causedby_player
         self.injured_team = injured_team
         self.causedby_team = causedby_team
 
-    def to_json(self):
-        return {
+    def to_json(self, comments=True):
+        fields = {
             "event_type": "injury",
-            "injury_type": str(self.injury_type),
+            "injury_type": INJURY_TYPE_NAMES[self.injury_type],
             "injured_team": self.injured_team,
             "injured_player": self.injured_player,
             "causedby_team": self.causedby_team,
             "causedby_player": self.causedby_player,
             "gameclock": self.gameclock,
             "shotclock": self.shotclock,
-            "comments": self.comments,
         }
+        if comments:
+            fields["comments"] = self.comments
+        return fields
 
 
 class SubEvent(BaseEvent):
+    __slots__ = ("sub_type", "player_in", "player_out", "team")
+
     def __init__(
         self,
-        comments: list[str],
+        sources: list["BBEvent"],
         clocks: Clocks,
         sub_type: SubType,
         player_in: int,
         player_out: int,
         team: int,
     ) -> None:
-        super().__init__(comments, clocks)
+        super().__init__(sources, clocks)
         self.sub_type = sub_type
         self.player_in = player_in
         self.player_out = player_out
         self.team = team
 
-    def to_json(self):
-        return {
+    def to_json(self, comments=True):
+        fields = {
             "event_type": "sub",
-            "sub_type": str(self.sub_type),
+            "sub_type": SUB_TYPE_NAMES[self.sub_type],
             "team": self.team,
             "player_in": self.player_in,
             "player_out": self.player_out,
             "gameclock": self.gameclock,
             "shotclock": self.shotclock,
-            "comments": self.comments,
         }
+        if comments:
+            fields["comments"] = self.comments
+        return fields
 
 
 class BreakEvent(BaseEvent):
+    __slots__ = ("break_type", "team")
+
     def __init__(
-        self, comments: list[str], clocks: Clocks, break_type: BreakType, team: int
+        self, sources: list["BBEvent"], clocks: Clocks, break_type: BreakType, team: int
     ) -> None:
-        super().__init__(comments, clocks)
+        super().__init__(sources, clocks)
         self.break_type = break_type
         self.team = team
 
-    def to_json(self):
+    def to_json(self, comments=True):
         return {
             "event_type": "break",
-            "break_type": str(self.break_type),
+            "break_type": BREAK_TYPE_NAMES[self.break_type],
             "team": self.team,
         }
 
 
 class BBEvent:
+    __slots__ = (
+        "team",
+        "type",
+        "result",
+        "variation",
+        "player1",
+        "player2",
+        "gameclock",
+        "realclock",
+        "data",
+        "player1obj",
+        "player2obj",
+        "commentary",
+        "_comment",
+    )
+
     def __init__(
         self,
         team: int,
@@ -354,12 +447,27 @@ class BBEvent:
         self.variation = variation
         self.player1 = player1
         self.player2 = player2
-        self.gameclock = Gameclock(gameclock)
+        self.gameclock = gameclock
         self.realclock = realclock
         self.data = data
-        self.comment = ""
         self.player1obj: Player
         self.player2obj: Player
+        # Set by Comments.bind, renders the comment on first access
+        self.commentary: Optional[tuple] = None
+        self._comment: Optional[str] = None
+
+    @property
+    def comment(self) -> str:
+        if self._comment is None:
+            if self.commentary is None:
+                return ""
+            comments, index, team1 = self.commentary
+            self._comment = comments.render(self, index, team1)
+        return self._comment
+
+    @comment.setter
+    def comment(self, text: str) -> None:
+        self._comment = text
 
     def __repr__(self) -> str:
         return """BBEvent
@@ -380,7 +488,7 @@ class BBEvent:
             self.variation,
             self.player1,
             self.player2,
-            self.gameclock.clock,
+            self.gameclock,
             self.realclock,
             self.data,
             self.comment,
@@ -406,438 +514,400 @@ class BBEvent:
             self.player1,
             p2,
             self.player2,
-            self.gameclock.clock,
+            self.gameclock,
             self.realclock,
             self.data,
             self.comment,
         )
 
 
-def convert(events: list[BBEvent]) -> list[BaseEvent]:
-    bb_idx = 0
-    base_events: list[BaseEvent] = []
-    shotclock = 0
+def convert_shot(
+    shot_type: ShotType,
+    events: list[BBEvent],
+    bb_idx: int,
+    event: BBEvent,
+    sources: list[BBEvent],
+    clocks: Clocks,
+    base_events: list[BaseEvent],
+) -> int:
+    eresult = event.result
+    unknown5 = 0
+    if eresult > 9:
+        if eresult < 13 or eresult > 14:
+            unknown5 = 1
+        eresult -= 9
+
+    shot_pos = create_shot(
+        event.team,
+        event.type,
+        event.player1obj.id,
+        event.player1obj.name,
+        clocks.game,
+    )
+
+    result_event = events[bb_idx]
+    bb_idx += 1
+    sources.append(result_event)
+
+    assert result_event.type == 0, f"This should be a result event"
+    shot_result = SHOT_RESULTS.get(result_event.result, ShotResult.MISSED)
+
+    next_event = events[bb_idx]
+    if next_event.type in (504, 507, 508, 509):
+        if shot_result == ShotResult.SCORED:
+            shot_result = ShotResult.SCORED_WITH_FOUL
+        elif shot_result == ShotResult.MISSED:
+            shot_result = ShotResult.MISSED_WITH_FOUL
+        elif shot_result == ShotResult.GOALTEND:
+            pass
+        else:
+            assert False, (
+                f"This shouldn't happen result: {str(shot_result)},\n"
+                f"next event: {next_event.type}\n",
+                f"data: {event.data}\n",
+                f"comments: {[e.comment for e in sources]}",
+            )
 
-    while bb_idx < len(events):
-        event = events[bb_idx]
-        bb_idx += 1
+    if unknown5 == 1:
+        # CHECKME: alters shot, block attempt?
+        defender = event.player2
+        assistant = None
+    elif eresult <= 3 or eresult == 7 or eresult == 6:
+        defender = event.player2
+        assistant = None
+    else:
+        defender = None
+        assistant = event.player2
+
+    base_events.append(
+        ShotEvent(
+            sources,
+            clocks=clocks,
+            shot_type=shot_type,
+            shot_result=shot_result,
+            attacker=event.player1,
+            defender=defender,
+            assistant=assistant,
+            att_team=event.team,
+            def_team=opponent(event.team),
+            shot_pos=shot_pos,
+        )
+    )
+    return bb_idx
 
-        comments = [event.comment]
-        clocks = Clocks(event.gameclock.clock, event.realclock, 0)
 
-        etype = event.type
-        eprefix = etype // 100
-        eresult = event.result
-        evar1 = int(event.data[4], 16)
-        evar2 = int(event.data[5], 16)
-        unknown5 = 0
+def convert_invalid_shot(events, bb_idx, event, sources, clocks, base_events) -> int:
+    ShotType(event.type)  # Raises for codes without a shot type
+    return bb_idx
 
-        if evar1 > 0:
-            eprefix = 99
 
-        if eresult > 9:
-            if eresult < 13 or eresult > 14:
-                unknown5 = 1
-            eresult -= 9
-        else:
-            unknown5 = 0
-
-        if etype >= 100 and etype < 500 and etype not in (210, 211, 212, 213, 214, 215):
-            shot_type = ShotType(etype)
-            shot_pos = create_shot(
-                event.team,
-                event.type,
-                event.player1obj.id,
-                event.player1obj.name,
-                event.gameclock.clock,
-            )
+def convert_ignored(events, bb_idx, event, sources, clocks, base_events) -> int:
+    return bb_idx
 
-            result_event = events[bb_idx]
-            bb_idx += 1
-            comments.append(result_event.comment)
-
-            assert result_event.type == 0, f"This should be a result event"
-            unknown2 = 1 if result_event.result == 1 or result_event.result == 4 else 0
-            if result_event.result == 0:
-                unknown2 = 2
-            elif result_event.result == 3 or result_event.result == 6:
-                unknown2 = 3
-            shot_result = ShotResult(unknown2)
-
-            next_event = events[bb_idx]
-            if next_event.type in (504, 507, 508, 509):
-                if shot_result == ShotResult.SCORED:
-                    shot_result = ShotResult.SCORED_WITH_FOUL
-                elif shot_result == ShotResult.MISSED:
-                    shot_result = ShotResult.MISSED_WITH_FOUL
-                elif shot_result == ShotResult.GOALTEND:
-                    pass
-                else:
-                    assert False, (
-                        f"This shouldn't happen result: {str(shot_result)},\n"
-                        f"next event: {next_event.type}\n",
-                        f"data: {event.data}\n",
-                        f"comments: {comments}",
-                    )
-
-            defender = None
-            assistant = None
-            if unknown5 == 1:
-                # CHECKME: alters shot, block attempt?
-                defender = event.player2
-                assistant = None
-            elif eresult <= 3 or eresult == 7 or eresult == 6:
-                defender = event.player2
-                assistant = None
-            else:
-                defender = None
-                assistant = event.player2
-
-            base_events.append(
-                ShotEvent(
-                    comments,
-                    clocks=clocks,
-                    shot_type=shot_type,
-                    shot_result=shot_result,
-                    attacker=event.player1,
-                    defender=defender,
-                    assistant=assistant,
-                    att_team=event.team,
-                    def_team=opponent(event.team),
-                    shot_pos=shot_pos,
-                )
-            )
 
-        elif etype in (210, 211, 212, 213, 214):
-            # We can find these ourselves
-            pass
-        elif etype == 215:
-            # Garbage time
-            pass
+def convert_free_throw(
+    shot_result: ShotResult, events, bb_idx, event, sources, clocks, base_events
+) -> int:
+    base_events.append(
+        FreeThrowEvent(
+            sources,
+            clocks,
+            FreeThrowType.REGULAR,
+            shot_result,
+            event.player1,
+            event.team,
+        )
+    )
+    return bb_idx
+
+
+def convert_foul(
+    foul_type: FoulType, events, bb_idx, event, sources, clocks, base_events
+) -> int:
+    base_events.append(
+        FoulEvent(
+            sources,
+            clocks,
+            foul_type,
+            event.player1,
+            event.player2,
+            event.team,
+            opponent(event.team),
+            flagrant=0,
+        )
+    )
+    return bb_idx
+
+
+def convert_flagrant(
+    flagrant: int, events, bb_idx, event, sources, clocks, base_events
+) -> int:
+    # Upgrade previous foul to a flagrant one
+    prev_event = base_events[-1]
+    assert isinstance(prev_event, FoulEvent)
+    prev_event.flagrant = flagrant
+    prev_event.sources.extend(sources)
+    return bb_idx
+
+
+def convert_interrupt(
+    interrupt_type: InterruptType,
+    swapped: bool,
+    events,
+    bb_idx,
+    event,
+    sources,
+    clocks,
+    base_events,
+) -> int:
+    # Steals and interceptions list the defender first
+    attacker, defender = event.player1, event.player2
+    if swapped:
+        attacker, defender = defender, attacker
+
+    base_events.append(
+        InterruptEvent(
+            sources,
+            clocks,
+            interrupt_type,
+            attacker,
+            defender,
+            event.team,
+            opponent(event.team),
+        )
+    )
+    return bb_idx
+
+
+def convert_injury(
+    injury_type: InjuryType, events, bb_idx, event, sources, clocks, base_events
+) -> int:
+    base_events.append(
+        InjuryEvent(
+            sources,
+            clocks,
+            injury_type,
+            event.player1,
+            event.player2,
+            event.team,
+            opponent(event.team),
+        )
+    )
+    return bb_idx
 
-        elif etype == 502 or etype == 503:
-            if etype == 502:
-                shot_result = ShotResult.SCORED
-            elif etype == 503:
-                shot_result = ShotResult.MISSED
-
-            base_events.append(
-                FreeThrowEvent(
-                    comments,
-                    clocks,
-                    FreeThrowType.REGULAR,
-                    shot_result,
-                    event.player1,
-                    event.team,
-                )
-            )
-        elif etype == 504:
-            base_events.append(
-                FoulEvent(
-                    comments,
-                    clocks,
-                    FoulType.SHOOTING_FOUL,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                    flagrant=0,
-                )
-            )
-        elif etype == 505:
-            base_events.append(
-                FoulEvent(
-                    comments,
-                    clocks,
-                    FoulType.PERSONAL_FOUL,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                    flagrant=0,
-                )
-            )
-        elif etype == 507:
-            assert False, "FIXME: event 507"
-        elif etype == 508:
-            base_events.append(
-                FoulEvent(
-                    comments,
-                    clocks,
-                    FoulType.PERSONAL_FOUL,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                    flagrant=0,
-                )
-            )
-        elif etype == 509:
-            # Upgrade previous foul to flagrant one
-            prev_event = base_events[-1]
-            assert isinstance(prev_event, FoulEvent)
-            prev_event.flagrant = 1
-            prev_event.comments.append(*comments)
-        elif etype == 510:
-            # Upgrade previous foul to flagrant two
-            prev_event = base_events[-1]
-            assert isinstance(prev_event, FoulEvent)
-            prev_event.flagrant = 2
-            prev_event.comments.append(*comments)
-        elif etype == 706:
-            break_type = (
-                BreakType.TIMEOUT_30 if event.result == 0 else BreakType.TIMEOUT_60
-            )
-            base_events.append(BreakEvent(comments, clocks, break_type, event.team))
-        elif etype == 801:
-            base_events.append(
-                InterruptEvent(
-                    comments,
-                    clocks,
-                    InterruptType.THREE_SEC_VIOLATION,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                )
-            )
-        elif etype == 802:
-            base_events.append(
-                InterruptEvent(
-                    comments,
-                    clocks,
-                    InterruptType.BALL_THROWN_OUT,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                )
-            )
-        elif etype == 803:
-            base_events.append(
-                FoulEvent(
-                    comments,
-                    clocks,
-                    FoulType.OFFENSIVE_FOUL,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                    flagrant=0,
-                )
-            )
-        elif etype == 804:
-            base_events.append(
-                InterruptEvent(
-                    comments,
-                    clocks,
-                    InterruptType.SHOTCLOCK_VIOLATION,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                )
-            )
-        elif etype == 807:
-            base_events.append(
-                InterruptEvent(
-                    comments,
-                    clocks,
-                    InterruptType.BALL_STOLEN,
-                    event.player2,
-                    event.player1,
-                    event.team,
-                    opponent(event.team),
-                )
-            )
-        elif etype == 808:
-            base_events.append(
-                InterruptEvent(
-                    comments,
-                    clocks,
-                    InterruptType.PASS_INTERCEPTED,
-                    event.player2,
-                    event.player1,
-                    event.team,
-                    opponent(event.team),
-                )
-            )
-        elif etype == 809:
-            # This assist is added as part of the shot event
-            base_events[-1].comments.extend(comments)
-        elif etype == 810:
-            base_events.append(
-                InterruptEvent(
-                    comments,
-                    clocks,
-                    InterruptType.TRAVELLING,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                )
-            )
-        elif etype == 812:
-            base_events.append(
-                InterruptEvent(
-                    comments,
-                    clocks,
-                    InterruptType.LOST_HANDLE,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                )
-            )
-        elif etype == 901:
-            # Seems to be connected to the previous event
-            base_events.append(
-                InjuryEvent(
-                    comments,
-                    clocks,
-                    InjuryType.INJURY_OUT,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                )
-            )
-        elif etype == 902:
-            # Just an information that player will return
-            base_events.append(
-                InjuryEvent(
-                    comments,
-                    clocks,
-                    InjuryType.INJURY_BACK,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                )
-            )
-        elif etype == 903:
-            # Looks like a random message, seems to be irrelevant for other events
-            base_events.append(
-                InjuryEvent(
-                    comments,
-                    clocks,
-                    InjuryType.EXHAUSTED,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                )
-            )
-        elif etype == 904:
-            assert False, "CHECKME 904"
-            base_events.append(
-                InjuryEvent(
-                    comments,
-                    clocks,
-                    InjuryType.FAINTED,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                )
-            )
-        elif etype == 931:
-            if event.result == 7:
-                rebound_type = ReboundType.OFF_REBOUND
-            elif event.result == 8:
-                rebound_type = ReboundType.DEF_REBOUND
-            elif event.result == 9:
-                rebound_type = ReboundType.DEFAULT_REBOUND
-            base_events.append(
-                ReboundEvent(
-                    comments,
-                    clocks,
-                    rebound_type,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                )
-            )
-        elif etype == 933:
-            base_events.append(
-                ReboundEvent(
-                    comments,
-                    clocks,
-                    ReboundType.JUMP_BALL,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                )
-            )
-        elif etype == 934:
-            if event.result == 7:
-                pass  # FIXME offensive?
-            elif event.result == 8:
-                pass  # FIXME defensive?
-            base_events.append(
-                ReboundEvent(
-                    comments,
-                    clocks,
-                    ReboundType.REBOUND_OUT_OF_BOUNDS,
-                    event.player1,
-                    event.player2,
-                    event.team,
-                    opponent(event.team),
-                )
-            )
-        elif etype == 951:
-            team = 1 if event.result > 4 else 0
-            if event.result == 0 or event.result == 5:
-                sub_type = SubType.SUB_PG
-            elif event.result == 1 or event.result == 6:
-                sub_type = SubType.SUB_SG
-            elif event.result == 2 or event.result == 7:
-                sub_type = SubType.SUB_SF
-            elif event.result == 3 or event.result == 8:
-                sub_type = SubType.SUB_PF
-            elif event.result == 4 or event.result == 9:
-                sub_type = SubType.SUB_C
-
-            base_events.append(
-                SubEvent(
-                    comments,
-                    clocks,
-                    sub_type,
-                    event.player1 - 1,
-                    event.player2 - 1,
-                    team,
-                )
-            )
-        elif etype == 952:
-            assert event.result == 0 or event.result == 1
-            team = event.result
-            base_events.append(
-                SubEvent(
-                    comments,
-                    clocks,
-                    SubType.POS_SWAP,
-                    event.player1 - 1,
-                    event.player2 - 1,
-                    team,
-                )
-            )
-        elif etype == 961:
-            base_events.append(
-                BreakEvent(comments, clocks, BreakType.END_OF_QUARTER, -1)
-            )
-        elif etype == 962:
-            base_events.append(BreakEvent(comments, clocks, BreakType.END_OF_GAME, -1))
-        elif etype == 963:
-            base_events.append(BreakEvent(comments, clocks, BreakType.END_OF_HALF, -1))
+
+def convert_rebound(events, bb_idx, event, sources, clocks, base_events) -> int:
+    if event.type == 931:
+        rebound_type = REBOUND_TYPES[event.result]
+    elif event.type == 933:
+        rebound_type = ReboundType.JUMP_BALL
+    else:
+        # FIXME result 7 offensive?, 8 defensive?
+        rebound_type = ReboundType.REBOUND_OUT_OF_BOUNDS
+
+    base_events.append(
+        ReboundEvent(
+            sources,
+            clocks,
+            rebound_type,
+            event.player1,
+            event.player2,
+            event.team,
+            opponent(event.team),
+        )
+    )
+    return bb_idx
+
+
+def convert_sub(events, bb_idx, event, sources, clocks, base_events) -> int:
+    if event.type == 951:
+        team = 1 if event.result > 4 else 0
+        sub_type = SUB_TYPES[event.result]
+    else:
+        assert event.result == 0 or event.result == 1
+        team = event.result
+        sub_type = SubType.POS_SWAP
+
+    base_events.append(
+        SubEvent(
+            sources,
+            clocks,
+            sub_type,
+            event.player1 - 1,
+            event.player2 - 1,
+            team,
+        )
+    )
+    return bb_idx
+
+
+def convert_timeout(events, bb_idx, event, sources, clocks, base_events) -> int:
+    break_type = BreakType.TIMEOUT_30 if event.result == 0 else BreakType.TIMEOUT_60
+    base_events.append(BreakEvent(sources, clocks, break_type, event.team))
+    return bb_idx
+
+
+def convert_break(
+    break_type: BreakType, events, bb_idx, event, sources, clocks, base_events
+) -> int:
+    base_events.append(BreakEvent(sources, clocks, break_type, -1))
+    return bb_idx
+
+
+def convert_assist(events, bb_idx, event, sources, clocks, base_events) -> int:
+    # This assist is added as part of the shot event
+    base_events[-1].sources.extend(sources)
+    return bb_idx
+
+
+def convert_unsupported(events, bb_idx, event, sources, clocks, base_events) -> int:
+    raise ValueError(f"unsupported event {event.type}")
+
+
+# Shot result of the synthetic result event (type 0) following every shot
+SHOT_RESULTS = {
+    0: ShotResult.GOALTEND,
+    1: ShotResult.SCORED,
+    3: ShotResult.BLOCKED,
+    4: ShotResult.SCORED,
+    6: ShotResult.BLOCKED,
+}
+
+REBOUND_TYPES = {
+    7: ReboundType.OFF_REBOUND,
+    8: ReboundType.DEF_REBOUND,
+    9: ReboundType.DEFAULT_REBOUND,
+}
+
+# Substitution result is the position, plus 5 for the away team
+SUB_TYPES = (
+    SubType.SUB_PG,
+    SubType.SUB_SG,
+    SubType.SUB_SF,
+    SubType.SUB_PF,
+    SubType.SUB_C,
+) * 2
+
+
+def build_converters() -> dict[int, Callable[..., int]]:
+    converters: dict[int, Callable[..., int]] = {}
+
+    shot_types = {int(t): t for t in ShotType}
+    for etype in range(100, 500):
+        if etype in shot_types:
+            converters[etype] = partial(convert_shot, shot_types[etype])
         else:
-            if etype != -100:
-                print(f"Unknown event {etype}")
+            converters[etype] = convert_invalid_shot
+
+    # 210-214 we can find ourselves, 215 is garbage time
+    for etype in (210, 211, 212, 213, 214, 215, -100):
+        converters[etype] = convert_ignored
+
+    converters[502] = partial(convert_free_throw, ShotResult.SCORED)
+    converters[503] = partial(convert_free_throw, ShotResult.MISSED)
+    converters[504] = partial(convert_foul, FoulType.SHOOTING_FOUL)
+    converters[505] = partial(convert_foul, FoulType.PERSONAL_FOUL)
+    converters[507] = convert_unsupported
+    converters[508] = partial(convert_foul, FoulType.PERSONAL_FOUL)
+    converters[509] = partial(convert_flagrant, 1)
+    converters[510] = partial(convert_flagrant, 2)
+    converters[706] = convert_timeout
+    converters[801] = partial(
+        convert_interrupt, InterruptType.THREE_SEC_VIOLATION, False
+    )
+    converters[802] = partial(convert_interrupt, InterruptType.BALL_THROWN_OUT, False)
+    converters[803] = partial(convert_foul, FoulType.OFFENSIVE_FOUL)
+    converters[804] = partial(
+        convert_interrupt, InterruptType.SHOTCLOCK_VIOLATION, False
+    )
+    converters[807] = partial(convert_interrupt, InterruptType.BALL_STOLEN, True)
+    converters[808] = partial(convert_interrupt, InterruptType.PASS_INTERCEPTED, True)
+    converters[809] = convert_assist
+    converters[810] = partial(convert_interrupt, InterruptType.TRAVELLING, False)
+    converters[812] = partial(convert_interrupt, InterruptType.LOST_HANDLE, False)
+    # 901 seems to be connected to the previous event, 902 is just an
+    # information that the player will return, 903 looks like a random
+    # message, irrelevant for other events
+    converters[901] = partial(convert_injury, InjuryType.INJURY_OUT)
+    converters[902] = partial(convert_injury, InjuryType.INJURY_BACK)
+    converters[903] = partial(convert_injury, InjuryType.EXHAUSTED)
+    converters[904] = convert_unsupported
+    converters[931] = convert_rebound
+    converters[933] = convert_rebound
+    converters[934] = convert_rebound
+    converters[951] = convert_sub
+    converters[952] = convert_sub
+    converters[961] = partial(convert_break, BreakType.END_OF_QUARTER)
+    converters[962] = partial(convert_break, BreakType.END_OF_GAME)
+    converters[963] = partial(convert_break, BreakType.END_OF_HALF)
+
+    return converters
+
+
+CONVERTERS = build_converters()
+
 
+def convert(events: list[BBEvent]) -> list[BaseEvent]:
+    base_events: list[BaseEvent] = []
+    convert_partial(events, 0, base_events, final=True)
     return base_events
 
 
+def convert_partial(
+    events: list[BBEvent], bb_idx: int, base_events: list[BaseEvent], final=False
+) -> int:
+    """Continue converting events, a list that may still grow, from bb_idx.
+
+    Shots look ahead at their result and the event after it, so unless final
+    the last two events are left for the next call. Returns the index to
+    continue from.
+    """
+    end = len(events) if final else len(events) - 2
+    converters = CONVERTERS
+
+    while bb_idx < end:
+        event = events[bb_idx]
+        bb_idx += 1
+
+        converter = converters.get(event.type)
+        if converter is None:
+            log.warning("Unknown event %d", event.type)
+            continue
+
+        clocks = Clocks(event.gameclock, event.realclock, 0)
+        bb_idx = converter(events, bb_idx, event, [event], clocks, base_events)
+
+    return bb_idx
+
+
+# Where each shot type lands: (angle offset, angle range, distance offset,
+# distance range), angles in whole degrees and distances in chart pixels.
+SHOT_ZONES = {
+    100: (0, 90, 94, 16),
+    101: (60, 20, 94, 16),
+    102: (0, 60, 94, 16),
+    103: (-12, 22, 94, 16),
+    104: (40, 60, 94, 40),
+    105: (40, 60, 130, 60),
+    200: (0, 90, 40, 450),
+    201: (50, 20, 45, 30),
+    202: (-10, 60, 45, 40),
+    203: (-15, 4, 35, 50),
+    204: (70, 20, 55, 35),
+    400: (0, 90, 8, 40),
+    401: (0, 90, 8, 24),
+    402: (0, 90, 9, 42),
+}
+DEFAULT_SHOT_ZONE = (0, 90, 9, 40)
+
+# Shot angles are whole degrees, sin and cos of each one is looked up rather
+# than computed. The tables come from math.sin/cos of the same radians, so
+# positions match computing them per shot bit for bit.
+ANGLE_OFFSET = 360
+SIN = [math.sin(math.radians(deg)) for deg in range(-ANGLE_OFFSET, ANGLE_OFFSET)]
+COS = [math.cos(math.radians(deg)) for deg in range(-ANGLE_OFFSET, ANGLE_OFFSET)]
+
+
 def create_shot(
     team: int,
     evtype: int,
@@ -845,99 +915,24 @@ def create_shot(
     pname: str,
     gameclock: int,
 ):
-    if evtype == 100:
-        loc8 = 0
-        loc9 = 90
-        loc10 = 94
-        loc11 = 16
-    elif evtype == 101:
-        loc8 = 60
-        loc9 = 20
-        loc10 = 94
-        loc11 = 16
-    elif evtype == 102:
-        loc8 = 0
-        loc9 = 60
-        loc10 = 94
-        loc11 = 16
-    elif evtype == 103:
-        loc8 = -12
-        loc9 = 22
-        loc10 = 94
-        loc11 = 16
-    elif evtype == 104:
-        loc8 = 40
-        loc9 = 60
-        loc10 = 94
-        loc11 = 40
-    elif evtype == 105:
-        loc8 = 40
-        loc9 = 60
-        loc10 = 130
-        loc11 = 60
-    elif evtype == 200:
-        loc8 = 0
-        loc9 = 90
-        loc10 = 40
-        loc11 = 450
-    elif evtype == 201:
-        loc8 = 50
-        loc9 = 20
-        loc10 = 45
-        loc11 = 30
-    elif evtype == 202:
-        loc8 = -10
-        loc9 = 60
-        loc10 = 45
-        loc11 = 40
-    elif evtype == 203:
-        loc8 = -15
-        loc9 = 4
-        loc10 = 35
-        loc11 = 50
-    elif evtype == 204:
-        loc8 = 70
-        loc9 = 20
-        loc10 = 55
-        loc11 = 35
-    elif evtype == 400:
-        loc8 = 0
-        loc9 = 90
-        loc10 = 8
-        loc11 = 40
-    elif evtype == 401:
-        loc8 = 0
-        loc9 = 90
-        loc10 = 8
-        loc11 = 24
-    elif evtype == 402:
-        loc8 = 0
-        loc9 = 90
-        loc10 = 9
-        loc11 = 42
-    else:
-        loc8 = 0
-        loc9 = 90
-        loc10 = 9
-        loc11 = 40
+    angle_offset, angle_range, dist_offset, dist_range = SHOT_ZONES.get(
+        evtype, DEFAULT_SHOT_ZONE
+    )
 
-    loc16 = pid >> gameclock % 3
-    if loc16 < 0:
-        loc16 *= -1
-
-    loc12 = (loc16 - gameclock) % loc11 + loc10
-    loc13 = float((loc16 + gameclock) % loc9 + loc8)
+    seed = abs(pid >> gameclock % 3)
+    dist = (seed - gameclock) % dist_range + dist_offset
+    angle = (seed + gameclock) % angle_range + angle_offset
     if gameclock % 2 == 1:
-        loc13 = 180 - loc13
+        angle = 180 - angle
 
-    loc13 = math.radians(loc13)
     if team == 0:
-        loc13 = -loc13
-        x_coord = int(math.sin(loc13) * loc12 + 347)
-        y_coord = int(math.cos(loc13) * loc12 + 96)
+        angle = ANGLE_OFFSET - angle
+        x_coord = int(SIN[angle] * dist + 347)
+        y_coord = int(COS[angle] * dist + 96)
     else:
-        x_coord = int(math.sin(loc13) * loc12 + 21)
-        y_coord = int(math.cos(loc13) * loc12 + 96)
+        angle += ANGLE_OFFSET
+        x_coord = int(SIN[angle] * dist + 21)
+        y_coord = int(COS[angle] * dist + 96)
 
     y_coord = max(min(y_coord, 188), 4)
     x_coord = max(min(x_coord, 364), 4)
@@ -947,14 +942,52 @@ def create_shot(
     return ShotPos(x_coord, y_coord)
 
 
+# SHOT_ZONES indexed by event type, row 0 holds the default
+SHOT_ZONE_TABLE = np.array(
+    [SHOT_ZONES.get(evtype, DEFAULT_SHOT_ZONE) for evtype in range(500)],
+    dtype=np.int64,
+)
+SIN_TABLE = np.array(SIN)
+COS_TABLE = np.array(COS)
+
+
+def create_shots(team, types, pids, gameclocks) -> tuple[np.ndarray, np.ndarray]:
+    """x and y of many shots at once, e.g. all of a season, same as calling
+    create_shot for each of them."""
+    team, types, pids, gameclocks = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.int64) for a in (team, types, pids, gameclocks))
+    )
+
+    known = (types >= 0) & (types < len(SHOT_ZONE_TABLE))
+    zone = SHOT_ZONE_TABLE[np.where(known, types, 0)]
+
+    seed = np.abs(pids >> gameclocks % 3)
+    dist = (seed - gameclocks) % zone[:, 3] + zone[:, 2]
+    angle = (seed + gameclocks) % zone[:, 1] + zone[:, 0]
+    angle = np.where(gameclocks % 2 == 1, 180 - angle, angle)
+
+    home = team == 0
+    angle = np.where(home, -angle, angle) + ANGLE_OFFSET
+    # astype truncates towards zero like int()
+    x_coord = (SIN_TABLE[angle] * dist + np.where(home, 347, 21)).astype(np.int64)
+    y_coord = (COS_TABLE[angle] * dist + 96).astype(np.int64)
+
+    y_coord = np.clip(y_coord, 4, 188)
+    x_coord = np.clip(x_coord, 4, 364)
+    two = types // 100 == 2
+    y_coord[two] = np.clip(y_coord[two], 14, 176)
+    return x_coord, y_coord
+
+
 if __name__ == "__main__":
-    from shot_chart import ShotChart
     import sys
 
-    sc = ShotChart()
+    from shot_chart import ShotChart
 
-    for i in range(2880):
-        shot = create_shot(0, int(sys.argv[1]), 51805514, "", i + 1)
-        sc.add_made(shot.x, shot.y)
+    # Area a shot type covers, as in shot_area/
+    sc = ShotChart()
+    x, y = create_shots(0, int(sys.argv[1]), 51805514, np.arange(1, 2881))
+    for posx, posy in zip(x.tolist(), y.tolist()):
+        sc.add_made(posx, posy)
 
     sc.save(f"shot_{sys.argv[1]}.png")
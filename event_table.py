@@ -0,0 +1,191 @@
+import unittest
+
+import numpy as np
+import xml.etree.ElementTree as XML
+
+from event import BBEvent
+
+# Columnar form of the events parse_report produces, one row per BBEvent.
+# "type" is the raw event code, rows with "flag" > 0 are the ones parse_report
+# turns into type -100. "synthetic" marks the result rows parse_report inserts
+# after every shot.
+EVENT_DTYPE = np.dtype(
+    [
+        ("team", np.int8),
+        ("type", np.int16),
+        ("result", np.int8),
+        ("flag", np.int8),
+        ("variation", np.int8),
+        ("player1", np.int8),
+        ("player2", np.int8),
+        ("gameclock", np.int16),
+        ("realclock", np.int16),
+        ("synthetic", np.bool_),
+    ]
+)
+
+EVENT_WIDTH = 17
+HEADER_WIDTH = 202
+
+# ASCII code -> digit value, -1 for characters that are not hex digits.
+_DIGITS = np.full(256, -1, dtype=np.int16)
+_DIGITS[ord("0") : ord("9") + 1] = np.arange(10)
+_DIGITS[ord("A") : ord("F") + 1] = np.arange(10, 16)
+_DIGITS[ord("a") : ord("f") + 1] = np.arange(10, 16)
+
+# Columns of a raw event which are decimal, the rest are hex digits.
+_DECIMAL = [0, 1, 2, 3, 5, 9, 10, 11, 12, 13, 14, 15, 16]
+
+
+def report_string(text: str) -> str:
+    root = XML.fromstring(text)
+    report = root.findtext("ReportString")
+    assert report, "Missing report string"
+    return report.strip()
+
+
+def decode_roster(report: str) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Player IDs of both teams and their starters (0-based roster indices)."""
+    ids = np.array([int(report[i : i + 8]) for i in range(0, 192, 8)], dtype=np.int64)
+    starters = _DIGITS[np.frombuffer(report[192:202].encode("ascii"), np.uint8)] - 1
+    return ids[:12], ids[12:], starters[:5], starters[5:]
+
+
+def decode_events(report: str) -> np.ndarray:
+    """Decode the event section of a report in one pass.
+
+    Gives the same events as parse_report, including the synthetic shot
+    result rows, without creating any per-event objects.
+    """
+    raw = np.frombuffer(report[HEADER_WIDTH:].encode("ascii"), np.uint8)
+    if len(raw) % EVENT_WIDTH != 0:
+        raise ValueError(f"Truncated report: {len(raw)} bytes of events")
+
+    digits = _DIGITS[raw.reshape(-1, EVENT_WIDTH)]
+    if (digits < 0).any() or (digits[:, _DECIMAL] > 9).any():
+        raise ValueError("Malformed event in report")
+
+    n = len(digits)
+    events = np.zeros(n, dtype=EVENT_DTYPE)
+    events["team"] = digits[:, 0]
+    events["type"] = digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    events["result"] = digits[:, 4]
+    events["flag"] = digits[:, 5]
+    events["variation"] = digits[:, 6]
+    events["player1"] = digits[:, 7]
+    events["player2"] = digits[:, 8]
+    events["gameclock"] = digits[:, 9:13] @ np.array([1000, 100, 10, 1], np.int16)
+    events["realclock"] = digits[:, 13:17] @ np.array([1000, 100, 10, 1], np.int16)
+
+    # Shots, dunks, layups etc. get a result event right after them
+    shots = (events["flag"] == 0) & np.isin(events["type"] // 100, (1, 2, 4))
+    offset = np.zeros(n, dtype=np.intp)
+    np.cumsum(shots[:-1], out=offset[1:])
+    pos = np.arange(n) + offset
+
+    table = np.zeros(n + int(shots.sum()), dtype=EVENT_DTYPE)
+    table[pos] = events
+
+    results = events[shots]
+    results["type"] = 0
+    results["variation"] = 0
+    results["result"] = np.where(
+        results["result"] > 9, results["result"] - 9, results["result"]
+    )
+    results["realclock"] += 2
+    results["synthetic"] = True
+    table[pos[shots] + 1] = results
+
+    return table
+
+
+_HEX = np.frombuffer(b"0123456789ABCDEF", np.uint8)
+
+
+def event_data(table: np.ndarray) -> list[str]:
+    """BBEvent.data of every row, built column-wise."""
+    chars = np.full((len(table), 8), ord("0"), dtype=np.uint8)
+    real = ~table["synthetic"]
+    etype = table["type"].astype(np.int64)
+    chars[:, 0] = _HEX[etype // 100 % 10]
+    chars[:, 1] = _HEX[etype // 10 % 10]
+    chars[:, 2] = _HEX[etype % 10]
+    chars[:, 3] = _HEX[table["result"]]
+    chars[:, 4] = _HEX[table["flag"]]
+    chars[:, 5] = _HEX[table["variation"]]
+    chars[:, 6] = _HEX[table["player1"]]
+    chars[:, 7] = _HEX[table["player2"]]
+    # Shot results are "000<result>0000"
+    chars[~real, :3] = ord("0")
+    chars[~real, 4:] = ord("0")
+    return chars.view("S8").ravel().astype("U8").tolist()
+
+
+def to_bbevents(table: np.ndarray) -> list[BBEvent]:
+    """Materialize BBEvent objects, identical to what parse_report returns."""
+    flagged = table["flag"] > 0
+    types = np.where(flagged, -100, table["type"]).tolist()
+    results = np.where(flagged, 0, table["result"]).tolist()
+
+    return [
+        BBEvent(*row)
+        for row in zip(
+            table["team"].tolist(),
+            types,
+            results,
+            table["variation"].tolist(),
+            table["player1"].tolist(),
+            table["player2"].tolist(),
+            table["gameclock"].tolist(),
+            table["realclock"].tolist(),
+            event_data(table),
+        )
+    ]
+
+
+class TestDecodeEvents(unittest.TestCase):
+    # Rosters, starters and the first 8 events of match 123786926, then a
+    # made shot with a result above 9 and a flagged rebound.
+    REPORT = (
+        "2259528524058561243009943975062842965855437572994454951746135758"
+        "4652133546521346477572895181464150581999508481775116737351806024"
+        "5180603351922806519228075192280800264845002648440026484300264842"
+        "2578B34578"
+        "093390383000300030203403B8002300060809901800023000711024007300360010"
+        "18099003000360011080790238005600141411504540065001719317038800650020"
+        "0201C025002000075"
+        "19318105802100078"
+    )
+
+    def test_same_as_parse_report(self):
+        from main import parse_report
+        from xml_readers import make_team
+
+        def fields(event: BBEvent) -> tuple:
+            return tuple(getattr(event, name) for name in BBEvent.__slots__[:9])
+
+        ht, at = make_team({}, []), make_team({}, [])
+        expected = [fields(e) for e in parse_report(self.REPORT, at, ht)]
+        table = decode_events(self.REPORT)
+        self.assertEqual([fields(e) for e in to_bbevents(table)], expected)
+        self.assertEqual(len(table), 14)  # 4 shots get a result row
+
+
+if __name__ == "__main__":
+    import sys
+    import tracemalloc
+
+    for path in sys.argv[1:]:
+        with open(path, mode="r", encoding="utf-8") as f:
+            table = decode_events(report_string(f.read()))
+
+        tracemalloc.start()
+        events = to_bbevents(table)
+        objects = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        print(
+            f"{path}: {len(table)} events, "
+            f"BBEvent {objects / len(events):.0f} B/event, "
+            f"table {table.itemsize} B/event"
+        )
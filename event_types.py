@@ -88,3 +88,20 @@ class BreakType(IntEnum):
     END_OF_QUARTER = 961
     END_OF_HALF = 963
     END_OF_GAME = 962
+
+
+def enum_names(enum) -> dict[int, str]:
+    """Saved name of each member, str() as Python 3.10 gives it, e.g.
+    "ShotType.LAYUP". Since 3.11 str() of an IntEnum is just the number."""
+    return {member: f"{enum.__name__}.{member.name}" for member in enum}
+
+
+SHOT_TYPE_NAMES = enum_names(ShotType)
+SHOT_RESULT_NAMES = enum_names(ShotResult)
+FREE_THROW_TYPE_NAMES = enum_names(FreeThrowType)
+INTERRUPT_TYPE_NAMES = enum_names(InterruptType)
+REBOUND_TYPE_NAMES = enum_names(ReboundType)
+FOUL_TYPE_NAMES = enum_names(FoulType)
+INJURY_TYPE_NAMES = enum_names(InjuryType)
+SUB_TYPE_NAMES = enum_names(SubType)
+BREAK_TYPE_NAMES = enum_names(BreakType)
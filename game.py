@@ -1,11 +1,15 @@
-from typing import Dict
+import copy
+from typing import Dict, Optional
 
 from bbapi import BBApi
+from clocks import till_break
 from team import Team
-from comments import Comments
+from comments import Comments, PlayerIndex
 from event import *
 from event_types import *
+from match_json import dumps, write_game
 from stats import *
+from store import DEFAULT_STORE, open_store
 import json
 
 
@@ -13,6 +17,13 @@ class Extension:
     def __init__(self):
         pass
 
+    def snapshot(self):
+        """State to hand back to restore() when a game is rewound."""
+        return copy.deepcopy(self.__dict__)
+
+    def restore(self, state) -> None:
+        self.__dict__.update(copy.deepcopy(state))
+
     def on_shot_event(self, game, event):
         pass
 
@@ -38,6 +49,29 @@ class Extension:
         pass
 
 
+# Extension method called for each event type
+EXTENSION_HOOKS = {
+    ShotEvent: "on_shot_event",
+    InterruptEvent: "on_interrupt_event",
+    FoulEvent: "on_foul_event",
+    ReboundEvent: "on_rebound_event",
+    FreeThrowEvent: "on_free_throw_event",
+    InjuryEvent: "on_injury_event",
+    SubEvent: "on_sub_event",
+    BreakEvent: "on_break_event",
+}
+
+
+class Snapshot:
+    """Game state after the first `played` events, see Game.snapshot."""
+
+    def __init__(self, played: int, state: tuple, teams: list, extensions: list):
+        self.played = played
+        self.state = state
+        self.teams = teams
+        self.extensions = extensions
+
+
 class Game:
     def __init__(
         self,
@@ -47,11 +81,14 @@ class Game:
         at: Team,
         args,
         extensions: list[Extension],
+        comments: Optional[Comments] = None,
+        snapshot_every: int = 0,
+        snapshot_quarters: bool = False,
     ) -> None:
         self.matchid = matchid
         self.events = events
         self.teams = [ht, at]
-        self.comments = Comments()
+        self.comments = comments if comments is not None else Comments()
         self.gameclock = 0
         self.shotclock = 24
         self.poss = 0
@@ -60,10 +97,24 @@ class Game:
         self.args = args
         self.event_index = 0
         self.baseevents: list[BaseEvent] = []
-        self.extensions = extensions
+        self.converted = 0
+        self.played = 0
+        self.complete = False
+        self.player_index: Optional[PlayerIndex] = None
+        self.prev_bev = BaseEvent([], Clocks(-1, -1, -1))
+        # Taken while playing, every N events and/or after each quarter
+        self.snapshot_every = snapshot_every
+        self.snapshot_quarters = snapshot_quarters
+        self.snapshots: dict[int, Snapshot] = {}
+        self.extensions: list[Extension] = []
+        self.hooks: dict[type, list] = {
+            event_type: [] for event_type in EXTENSION_HOOKS
+        }
+        for ext in extensions:
+            self.add_extension(ext)
 
     def update_clocks(self, shot: int, game: int):
-        self.shotclock = min(shot, Gameclock(game).till_break())
+        self.shotclock = min(shot, till_break(game))
         self.gameclock = game
 
         if self.args.print_events:
@@ -88,235 +139,343 @@ class Game:
             clock -= (self.quarter - 4) * 420
         return clock
 
-    def play(self) -> None:
-        idx = 0
-        for event in self.events:
-            comment = self.comments.get_comment(event, self.teams)
-            event.comment = comment
-            idx += 1
+    def add_extension(self, ext: Extension) -> None:
+        self.extensions.append(ext)
+
+        # Only hooks the extension overrides are called, the defaults are no-ops
+        for event_type, name in EXTENSION_HOOKS.items():
+            if getattr(type(ext), name) is not getattr(Extension, name):
+                self.hooks[event_type].append(getattr(ext, name))
+
+    def play_shot(self, bev: ShotEvent, gameclock: int) -> None:
+        att_team = self.teams[bev.att_team]
+        def_team = self.teams[bev.def_team]
+
+        if bev.is_3pt():
+            pts = 3
+
+            if not (bev.is_fouled() and bev.has_missed()):
+                att_team.add_stats(Statistic.ThreePointsAtt, 1, bev.attacker)
+
+            if bev.has_scored():
+                att_team.add_stats(Statistic.ThreePointsMade, 1, bev.attacker)
+        else:
+            pts = 2
+
+        if not (bev.is_fouled() and bev.has_missed()):
+            att_team.add_stats(Statistic.FieldGoalsAtt, 1, bev.attacker)
+
+        self.patch_clock(bev, self.prev_bev)
+
+        if bev.has_scored():
+            att_team.add_stats(Statistic.FieldGoalsMade, 1, bev.attacker)
+            att_team.add_stats(Statistic.Points, pts, bev.attacker)
+            for player in att_team.active:
+                player.add_stats(Statistic.PlusMinus, pts)
+            for player in def_team.active:
+                player.add_stats(Statistic.PlusMinus, -pts)
+            att_team.shot_chart.add_made(bev.shot_x, bev.shot_y)
+            if not bev.is_fouled():
+                self.update_clocks(24, gameclock)
+                self.update_possession(bev.def_team)
+        else:
+            att_team.shot_chart.add_miss(bev.shot_x, bev.shot_y)
+
+        if bev.is_blocked():
+            def_team.add_stats(Statistic.Blocks, 1, bev.defender)
+
+        if bev.is_assisted():
+            att_team.add_stats(Statistic.Assists, 1, bev.assistant)
+
+    def play_free_throw(self, bev: FreeThrowEvent, gameclock: int) -> None:
+        att_team = self.teams[bev.att_team]
+        def_team = self.teams[opponent(bev.att_team)]
+
+        att_team.add_stats(Statistic.FreeThrowsAtt, 1, bev.attacker)
+        if bev.has_scored():
+            att_team.add_stats(Statistic.FreeThrowsMade, 1, bev.attacker)
+            att_team.add_stats(Statistic.Points, 1, bev.attacker)
+
+            for player in att_team.active:
+                player.add_stats(Statistic.PlusMinus, 1)
+            for player in def_team.active:
+                player.add_stats(Statistic.PlusMinus, -1)
+
+    def play_rebound(self, bev: ReboundEvent, gameclock: int) -> None:
+        att_team = self.teams[bev.att_team]
+        def_team = self.teams[bev.def_team]
+
+        if not bev.is_jumpball():
+            self.patch_clock(bev, self.prev_bev)
+            self.update_clocks(24, gameclock)
+
+        if bev.is_rebound():
+            if bev.is_off_rebound():
+                att_team.add_stats(Statistic.OffRebounds, 1, bev.attacker)
+            else:
+                def_team.add_stats(Statistic.DefRebounds, 1, bev.attacker)
+                self.update_possession(bev.def_team)
+        elif bev.is_jumpball():
+            bev.shotclock = 0
+            self.update_clocks(24, gameclock)
+            self.update_possession(bev.att_team)
+
+            # Who will start each quarter
+            if self.event_index == 0:
+                self.quater_poss = [
+                    bev.att_team,
+                    bev.def_team,
+                    bev.def_team,
+                    bev.att_team,
+                ]
+
+    def play_interrupt(self, bev: InterruptEvent, gameclock: int) -> None:
+        att_team = self.teams[bev.att_team]
+        def_team = self.teams[bev.def_team]
+
+        self.patch_clock(bev, self.prev_bev)
+
+        if bev.interrupt_type in (
+            InterruptType.BALL_THROWN_OUT,
+            InterruptType.LOST_HANDLE,
+            InterruptType.THREE_SEC_VIOLATION,
+            InterruptType.TRAVELLING,
+        ):
+            att_team.add_stats(Statistic.Turnovers, 1, bev.attacker)
+            self.update_clocks(24, gameclock)
+            self.update_possession(bev.def_team)
+        elif bev.interrupt_type in (
+            InterruptType.PASS_INTERCEPTED,
+            InterruptType.BALL_STOLEN,
+        ):
+            att_team.add_stats(Statistic.Turnovers, 1, bev.attacker)
+            def_team.add_stats(Statistic.Steals, 1, bev.defender)
+            self.update_clocks(24, gameclock)
+            self.update_possession(bev.def_team)
+        elif bev.interrupt_type in (InterruptType.SHOTCLOCK_VIOLATION,):
+            att_team.add_stats(Statistic.Turnovers, 1)
+            self.update_clocks(24, gameclock)
+            self.update_possession(bev.def_team)
+
+    def play_foul(self, bev: FoulEvent, gameclock: int) -> None:
+        att_team = self.teams[bev.att_team]
+        def_team = self.teams[bev.def_team]
+
+        self.patch_clock(bev, self.prev_bev)
+
+        if bev.foul_type == FoulType.OFFENSIVE_FOUL:
+            att_team.add_stats(Statistic.Turnovers, 1, bev.attacker)
+            att_team.add_stats(Statistic.Fouls, 1, bev.attacker)
+            self.update_clocks(24, gameclock)
+            self.update_possession(bev.def_team)
+        elif bev.foul_type == FoulType.PERSONAL_FOUL:
+            if def_team.stats.qtr[self.quarter - 1].sheet[Statistic.Fouls] < 4:
+                if bev.shotclock < 14:
+                    self.update_clocks(14, gameclock)
+                else:
+                    self.update_clocks(bev.shotclock, gameclock)
+            else:
+                self.update_clocks(24, gameclock)
+        elif bev.foul_type == FoulType.SHOOTING_FOUL:
+            self.update_clocks(24, gameclock)
+
+        if bev.foul_type in (
+            FoulType.PERSONAL_FOUL,
+            FoulType.SHOOTING_FOUL,
+        ):
+            def_team.add_stats(Statistic.Fouls, 1, bev.defender)
+
+    def play_injury(self, bev: InjuryEvent, gameclock: int) -> None:
+        self.patch_clock(bev, self.prev_bev)
+
+    def play_sub(self, bev: SubEvent, gameclock: int) -> None:
+        team = self.teams[bev.team]
+        team.update_minutes(gameclock)
+
+        self.patch_clock(bev, self.prev_bev)
+
+        if bev.sub_type != SubType.POS_SWAP:
+            team.make_sub(bev.sub_type, bev.player_out, bev.player_in)
+        else:
+            team.make_swap(bev.player_in, bev.player_out)
+
+    def play_break(self, bev: BreakEvent, gameclock: int) -> None:
+        if bev.break_type == BreakType.END_OF_QUARTER:
+            self.update_clocks(24, bev.gameclock)
+
+            if self.quarter < 4 or self.teams[0].points() == self.teams[1].points():
+                self.teams[0].push_stat_sheet()
+                self.teams[1].push_stat_sheet()
+                self.quarter += 1
+
+            if self.quarter <= 4:
+                self.update_possession(self.quater_poss[self.quarter - 1])
+        elif bev.break_type == BreakType.END_OF_HALF:
+            pass
+        elif bev.break_type == BreakType.END_OF_GAME:
+            for team in self.teams:
+                team.update_minutes(gameclock)
+        elif bev.break_type == BreakType.TIMEOUT_30:
+            self.teams[bev.team].add_stats(Statistic.Timeouts30, 1)
+        elif bev.break_type == BreakType.TIMEOUT_60:
+            self.teams[bev.team].add_stats(Statistic.Timeouts60, 1)
+
+    HANDLERS = {
+        ShotEvent: play_shot,
+        FreeThrowEvent: play_free_throw,
+        ReboundEvent: play_rebound,
+        InterruptEvent: play_interrupt,
+        FoulEvent: play_foul,
+        InjuryEvent: play_injury,
+        SubEvent: play_sub,
+        BreakEvent: play_break,
+    }
+
+    def start(self) -> None:
+        """Start a replay, raw events are then passed in with feed()."""
+        self.events = []
+        self.baseevents = []
+        self.converted = 0  # Next raw event to convert
+        self.played = 0  # Next base event to play
+        self.complete = False
+        self.player_index = PlayerIndex(self.teams)
+        self.prev_bev = BaseEvent([], Clocks(-1, -1, -1))
 
         for team in self.teams:
             team.push_stat_sheet()
 
-        self.baseevents = convert(self.events)
-        prev_bev = BaseEvent([], Clocks(-1, -1, -1))
+        self.snapshots = {0: self.snapshot()}
 
-        for idx, bev in enumerate(self.baseevents):
-            if self.args.print_events:
-                print()
-                print("###", bev.gameclock, bev.comments)
+    def feed(self, events: list[BBEvent], play=True) -> int:
+        """Append raw events of a (partial) report and, unless play is False,
+        advance the game as far as they allow. Returns the number of events
+        played. The last few events are held back until the ones after them
+        arrive, or until finish()."""
+        # Comments are only rendered when printed or saved
+        for event in events:
+            self.comments.bind(event, self.teams, self.player_index)
+        self.events.extend(events)
 
-            self.event_index = idx
-            gameclock = self.gameclock_normalized(bev.gameclock)
+        self.converted = convert_partial(
+            self.events, self.converted, self.baseevents, self.complete
+        )
 
-            if isinstance(bev, ShotEvent):
-                att_team = self.teams[bev.att_team]
-                def_team = self.teams[bev.def_team]
+        count = 0
+        while play and self.step() is not None:
+            count += 1
+        return count
 
-                if bev.is_3pt():
-                    pts = 3
+    def step(self) -> Optional[BaseEvent]:
+        """Play the next event, None if it can not be played yet."""
+        idx = self.played
+        baseevents = self.baseevents
 
-                    if not (bev.is_fouled() and bev.has_missed()):
-                        att_team.add_stats(Statistic.ThreePointsAtt, 1, bev.attacker)
+        # Flagrant fouls and assists still amend the last converted event and
+        # prev_bev depends on the clock of the event after it.
+        if idx + 1 >= len(baseevents) and not (self.complete and idx < len(baseevents)):
+            return None
 
-                    if bev.has_scored():
-                        att_team.add_stats(Statistic.ThreePointsMade, 1, bev.attacker)
-                else:
-                    pts = 2
-
-                if not (bev.is_fouled() and bev.has_missed()):
-                    att_team.add_stats(Statistic.FieldGoalsAtt, 1, bev.attacker)
-
-                self.patch_clock(bev, prev_bev)
-
-                if bev.has_scored():
-                    att_team.add_stats(Statistic.FieldGoalsMade, 1, bev.attacker)
-                    att_team.add_stats(Statistic.Points, pts, bev.attacker)
-                    for player in att_team.active:
-                        player.add_stats(Statistic.PlusMinus, pts)
-                    for player in def_team.active:
-                        player.add_stats(Statistic.PlusMinus, -pts)
-                    att_team.shot_chart.add_made(bev.shot_pos.x, bev.shot_pos.y)
-                    if not bev.is_fouled():
-                        self.update_clocks(24, gameclock)
-                        self.update_possession(bev.def_team)
-                else:
-                    att_team.shot_chart.add_miss(bev.shot_pos.x, bev.shot_pos.y)
-
-                if bev.is_blocked():
-                    def_team.add_stats(Statistic.Blocks, 1, bev.defender)
-
-                if bev.is_assisted():
-                    att_team.add_stats(Statistic.Assists, 1, bev.assistant)
-
-                for ext in self.extensions:
-                    ext.on_shot_event(self, bev)
-
-            elif isinstance(bev, FreeThrowEvent):
-                att_team = self.teams[bev.att_team]
-                def_team = self.teams[opponent(bev.att_team)]
-
-                att_team.add_stats(Statistic.FreeThrowsAtt, 1, bev.attacker)
-                if bev.has_scored():
-                    att_team.add_stats(Statistic.FreeThrowsMade, 1, bev.attacker)
-                    att_team.add_stats(Statistic.Points, 1, bev.attacker)
-
-                    for player in att_team.active:
-                        player.add_stats(Statistic.PlusMinus, 1)
-                    for player in def_team.active:
-                        player.add_stats(Statistic.PlusMinus, -1)
-
-                for ext in self.extensions:
-                    ext.on_free_throw_event(self, bev)
-
-            elif isinstance(bev, ReboundEvent):
-                att_team = self.teams[bev.att_team]
-                def_team = self.teams[bev.def_team]
-
-                if not bev.is_jumpball():
-                    self.patch_clock(bev, prev_bev)
-                    self.update_clocks(24, gameclock)
-
-                if bev.is_rebound():
-                    if bev.is_off_rebound():
-                        att_team.add_stats(Statistic.OffRebounds, 1, bev.attacker)
-                    else:
-                        def_team.add_stats(Statistic.DefRebounds, 1, bev.attacker)
-                        self.update_possession(bev.def_team)
-                elif bev.is_jumpball():
-                    bev.shotclock = 0
-                    self.update_clocks(24, gameclock)
-                    self.update_possession(bev.att_team)
-
-                    # Who will start each quarter
-                    if idx == 0:
-                        self.quater_poss = [
-                            bev.att_team,
-                            bev.def_team,
-                            bev.def_team,
-                            bev.att_team,
-                        ]
-
-                for ext in self.extensions:
-                    ext.on_rebound_event(self, bev)
-
-            elif isinstance(bev, InterruptEvent):
-                att_team = self.teams[bev.att_team]
-                def_team = self.teams[bev.def_team]
-
-                self.patch_clock(bev, prev_bev)
-
-                if bev.interrupt_type in (
-                    InterruptType.BALL_THROWN_OUT,
-                    InterruptType.LOST_HANDLE,
-                    InterruptType.THREE_SEC_VIOLATION,
-                    InterruptType.TRAVELLING,
-                ):
-                    att_team.add_stats(Statistic.Turnovers, 1, bev.attacker)
-                    self.update_clocks(24, gameclock)
-                    self.update_possession(bev.def_team)
-                elif bev.interrupt_type in (
-                    InterruptType.PASS_INTERCEPTED,
-                    InterruptType.BALL_STOLEN,
-                ):
-                    att_team.add_stats(Statistic.Turnovers, 1, bev.attacker)
-                    def_team.add_stats(Statistic.Steals, 1, bev.defender)
-                    self.update_clocks(24, gameclock)
-                    self.update_possession(bev.def_team)
-                elif bev.interrupt_type in (InterruptType.SHOTCLOCK_VIOLATION,):
-                    att_team.add_stats(Statistic.Turnovers, 1)
-                    self.update_clocks(24, gameclock)
-                    self.update_possession(bev.def_team)
-
-                for ext in self.extensions:
-                    ext.on_interrupt_event(self, bev)
-
-            elif isinstance(bev, FoulEvent):
-                att_team = self.teams[bev.att_team]
-                def_team = self.teams[bev.def_team]
-
-                self.patch_clock(bev, prev_bev)
-
-                if bev.foul_type == FoulType.OFFENSIVE_FOUL:
-                    att_team.add_stats(Statistic.Turnovers, 1, bev.attacker)
-                    att_team.add_stats(Statistic.Fouls, 1, bev.attacker)
-                    self.update_clocks(24, gameclock)
-                    self.update_possession(bev.def_team)
-                elif bev.foul_type == FoulType.PERSONAL_FOUL:
-                    if def_team.stats.qtr[self.quarter - 1].sheet[Statistic.Fouls] < 4:
-                        if bev.shotclock < 14:
-                            self.update_clocks(14, gameclock)
-                        else:
-                            self.update_clocks(bev.shotclock, gameclock)
-                    else:
-                        self.update_clocks(24, gameclock)
-                elif bev.foul_type == FoulType.SHOOTING_FOUL:
-                    self.update_clocks(24, gameclock)
-
-                if bev.foul_type in (
-                    FoulType.PERSONAL_FOUL,
-                    FoulType.SHOOTING_FOUL,
-                ):
-                    def_team.add_stats(Statistic.Fouls, 1, bev.defender)
-
-                for ext in self.extensions:
-                    ext.on_foul_event(self, bev)
-
-            elif isinstance(bev, InjuryEvent):
-                self.patch_clock(bev, prev_bev)
-
-                for ext in self.extensions:
-                    ext.on_injury_event(self, bev)
-
-            elif isinstance(bev, SubEvent):
-                team = self.teams[bev.team]
-                team.update_minutes(gameclock)
+        bev = baseevents[idx]
+        self.played = idx + 1
 
-                self.patch_clock(bev, prev_bev)
+        if self.args.print_events:
+            print()
+            print("###", bev.gameclock, bev.comments)
+
+        self.event_index = idx
+        gameclock = self.gameclock_normalized(bev.gameclock)
+
+        event_type = type(bev)
+        handler = self.HANDLERS.get(event_type)
+        if handler is not None:
+            handler(self, bev, gameclock)
+            for hook in self.hooks[event_type]:
+                hook(self, bev)
+
+        if (
+            idx + 1 < len(baseevents)
+            and (
+                bev.gameclock != baseevents[idx + 1].gameclock
+                or isinstance(bev, ReboundEvent)
+            )
+        ) or bev.gameclock == -1:
+            self.prev_bev = bev
+
+        # Stepping again over a position (after a seek) keeps its snapshot
+        if (
+            (self.snapshot_every and self.played % self.snapshot_every == 0)
+            or (
+                self.snapshot_quarters
+                and event_type is BreakEvent
+                and bev.break_type == BreakType.END_OF_QUARTER
+            )
+        ) and self.played not in self.snapshots:
+            self.snapshots[self.played] = self.snapshot()
+
+        return bev
+
+    def snapshot(self) -> Snapshot:
+        """Copy of everything playing changes: the clocks, possession, team,
+        player and stat sheet state and the extensions. The events themselves
+        are kept, converting them again gives the same ones."""
+        state = (
+            self.gameclock,
+            self.shotclock,
+            self.poss,
+            self.quarter,
+            self.quater_poss[:],
+            self.event_index,
+            self.prev_bev,
+        )
+        return Snapshot(
+            self.played,
+            state,
+            [team.snapshot() for team in self.teams],
+            [ext.snapshot() for ext in self.extensions],
+        )
 
-                if bev.sub_type != SubType.POS_SWAP:
-                    team.make_sub(bev.sub_type, bev.player_out, bev.player_in)
-                else:
-                    team.make_swap(bev.player_in, bev.player_out)
-
-                for ext in self.extensions:
-                    ext.on_sub_event(self, bev)
-
-            elif isinstance(bev, BreakEvent):
-                if bev.break_type == BreakType.END_OF_QUARTER:
-                    self.update_clocks(24, bev.gameclock)
-
-                    if (
-                        self.quarter < 4
-                        or self.teams[0].points() == self.teams[1].points()
-                    ):
-                        self.teams[0].push_stat_sheet()
-                        self.teams[1].push_stat_sheet()
-                        self.quarter += 1
-
-                    if self.quarter <= 4:
-                        self.update_possession(self.quater_poss[self.quarter - 1])
-                elif bev.break_type == BreakType.END_OF_HALF:
-                    pass
-                elif bev.break_type == BreakType.END_OF_GAME:
-                    for team in self.teams:
-                        team.update_minutes(gameclock)
-                elif bev.break_type == BreakType.TIMEOUT_30:
-                    self.teams[bev.team].add_stats(Statistic.Timeouts30, 1)
-                elif bev.break_type == BreakType.TIMEOUT_60:
-                    self.teams[bev.team].add_stats(Statistic.Timeouts60, 1)
-
-                for ext in self.extensions:
-                    ext.on_break_event(self, bev)
-
-            if (
-                idx + 1 < len(self.baseevents)
-                and (
-                    bev.gameclock != self.baseevents[idx + 1].gameclock
-                    or isinstance(bev, ReboundEvent)
-                )
-            ) or bev.gameclock == -1:
-                prev_bev = bev
+    def restore(self, snap: Snapshot, keep_later=True) -> None:
+        """Continue from snap. Unless keep_later, the snapshots taken after it
+        are dropped, e.g. before the remaining events are altered."""
+        (
+            self.gameclock,
+            self.shotclock,
+            self.poss,
+            self.quarter,
+            quater_poss,
+            self.event_index,
+            self.prev_bev,
+        ) = snap.state
+        self.quater_poss = quater_poss[:]
+        for team, state in zip(self.teams, snap.teams):
+            team.restore(state)
+        for ext, state in zip(self.extensions, snap.extensions):
+            ext.restore(state)
+        self.played = snap.played
+
+        if not keep_later:
+            self.snapshots = {
+                played: s
+                for played, s in self.snapshots.items()
+                if played <= snap.played
+            }
+
+    def seek(self, played: int) -> int:
+        """Go to the state after the first `played` events, from the closest
+        snapshot before it. Returns the position reached, less than played if
+        the events after it have not been fed yet."""
+        closest = max(p for p in self.snapshots if p <= played)
+        if not closest <= self.played <= played:
+            self.restore(self.snapshots[closest])
+
+        while self.played < played and self.step() is not None:
+            pass
+        return self.played
+
+    def finish(self) -> None:
+        """The report is complete, play the remaining events."""
+        self.complete = True
+        self.feed([])
 
         for team in reversed(self.teams):
             if self.args.print_stats:
@@ -326,12 +485,27 @@ class Game:
 
         # Verify data against BBApi boxscore
         if self.args.username and self.args.password and self.args.verify:
-            bbapi = BBApi(self.args.username, self.args.password)
+            bbapi = BBApi(
+                self.args.username,
+                self.args.password,
+                store=open_store(getattr(self.args, "store", DEFAULT_STORE)),
+            )
             bbteams = bbapi.boxscore(matchid=self.matchid)
             assert bbteams[0] == self.teams[1]
             assert bbteams[1] == self.teams[0]
 
-    def save(self, filename):
+    def play(self) -> None:
+        events = self.events
+        self.start()
+        self.feed(events)
+        self.finish()
+
+    def score(self) -> tuple[int, int]:
+        """Current points of the home and away team."""
+        return self.teams[0].points(), self.teams[1].points()
+
+    def box_score(self) -> list[dict]:
+        """Current stats of both teams and their players, as saved."""
         teams = []
         for tid, team in enumerate(self.teams):
             players = []
@@ -357,19 +531,36 @@ class Game:
 
             t = {"id": team.id, "name": team.name, "players": players, "stats": stats}
             teams.append(t)
+        return teams
 
-        events = []
-        for event in self.baseevents:
-            events.append(event.to_json())
+    def save(
+        self,
+        filename,
+        comments: Optional[bool] = None,
+        indent: Optional[int] = None,
+        dumps=dumps,
+    ):
+        """Write the box score and events as JSON, compact (by dumps) unless
+        indent is given."""
+        if comments is None:
+            comments = not getattr(self.args, "no_commentary", False)
+
+        teams = self.box_score()
+        events = (event.to_json(comments) for event in self.baseevents)
+
+        if indent is None:
+            with open(filename, "wb") as f:
+                write_game(f, teams, events, dumps)
+            return
 
         game = {
             "teamHome": teams[0],
             "teamAway": teams[1],
-            "events": events,
+            "events": list(events),
         }
 
         with open(filename, "w", encoding='utf-8') as f:
-            json.dump(game, f, indent=4, ensure_ascii=False)
+            json.dump(game, f, indent=indent, ensure_ascii=False)
 
 
 class Possessions(Extension):
@@ -413,15 +604,6 @@ class Possessions(Extension):
         if game.poss == event.def_team:
             self.add_possession(game, event.att_team, event.shotclock)
 
-    def on_free_throw_event(self, game: Game, event: FreeThrowEvent):
-        pass
-
-    def on_injury_event(self, game: Game, event: InjuryEvent):
-        pass
-
-    def on_sub_event(self, game: Game, event: SubEvent):
-        pass
-
     def on_break_event(self, game: Game, event: BreakEvent):
         if event.break_type == BreakType.END_OF_QUARTER:
             prev_bev = game.baseevents[game.event_index - 1]
@@ -475,24 +657,3 @@ class ShotTypes(Extension):
         )
         shot_type[result] += 1
         self.shot_types[event.att_team][str(event.shot_type)] = shot_type
-
-    def on_interrupt_event(self, game: Game, event: InterruptEvent):
-        pass
-
-    def on_foul_event(self, game: Game, event: FoulEvent):
-        pass
-
-    def on_rebound_event(self, game: Game, event: ReboundEvent):
-        pass
-
-    def on_free_throw_event(self, game: Game, event: FreeThrowEvent):
-        pass
-
-    def on_injury_event(self, game: Game, event: InjuryEvent):
-        pass
-
-    def on_sub_event(self, game: Game, event: SubEvent):
-        pass
-
-    def on_break_event(self, game: Game, event: BreakEvent):
-        pass
@@ -0,0 +1,264 @@
+import numpy as np
+
+from box_score import SCORED, concat_tables, find_shots
+from event import create_shots
+from event_table import decode_events, decode_roster
+from event_types import ShotType
+from shot_chart import COURT_HEIGHT, COURT_WIDTH, court
+from xml_readers import read_report_xml
+
+# Bins are CELL x CELL pixels of the shot chart court
+CELL = 8
+ROWS = COURT_HEIGHT // CELL
+COLS = COURT_WIDTH // CELL
+
+SHOT_TYPES = list(ShotType)
+# Event code -> index into SHOT_TYPES, -1 for codes that are no shot type
+TYPE_INDEX = np.full(500, -1, dtype=np.int64)
+TYPE_INDEX[[int(shot_type) for shot_type in SHOT_TYPES]] = np.arange(len(SHOT_TYPES))
+
+# Columns of ShotHeatmap.keys
+TEAM, PLAYER, TYPE, BIN = range(4)
+
+
+class ShotHeatmap:
+    """Shot attempts and makes of many matches, binned over the court.
+
+    Counts are kept sparse, one row per (team ID, player ID, shot type, bin)
+    that had a shot, so the per team, player and ShotType histograms of a
+    whole league fit in a few MB. Heatmaps of different processes are
+    combined with +=.
+    """
+
+    def __init__(self) -> None:
+        self.keys = np.zeros((0, 4), dtype=np.int64)
+        self.counts = np.zeros((0, 2), dtype=np.int64)  # attempts, makes
+        self.pending: list[tuple[np.ndarray, np.ndarray]] = []
+
+    def add_shots(self, team_ids, player_ids, types, x, y, made) -> None:
+        """Add shots by their event code, chart position and whether they
+        scored."""
+        type_index = TYPE_INDEX[np.asarray(types)]
+        known = type_index >= 0
+        row = np.clip(np.asarray(y) // CELL, 0, ROWS - 1)
+        col = np.clip(np.asarray(x) // CELL, 0, COLS - 1)
+
+        keys = np.stack(
+            [
+                np.asarray(team_ids, dtype=np.int64),
+                np.asarray(player_ids, dtype=np.int64),
+                type_index,
+                row * COLS + col,
+            ],
+            axis=1,
+        )[known]
+        made = np.asarray(made, dtype=np.int64)[known]
+        self.pending.append((keys, np.stack([np.ones_like(made), made], axis=1)))
+
+    def add_matches(self, tables: list[np.ndarray], rosters, team_ids) -> None:
+        """Add every shot of many matches at once, from their decoded event
+        tables, (2, 12) roster IDs and (home, away) team IDs."""
+        if not tables:
+            return
+        ev, match, etype = concat_tables(tables)
+        idx, shot_result = find_shots(ev, match, etype)
+
+        m = match[idx]
+        side = ev["team"][idx].astype(np.int64)
+        # Same wrap around as players[pid - 1] in Comments.bind
+        slot = (ev["player1"][idx].astype(np.int64) - 1) % 12
+        player_ids = np.asarray(rosters, dtype=np.int64)[m, side, slot]
+        x, y = create_shots(side, etype[idx], player_ids, ev["gameclock"][idx])
+
+        self.add_shots(
+            np.asarray(team_ids, dtype=np.int64)[m, side],
+            player_ids,
+            etype[idx],
+            x,
+            y,
+            np.isin(shot_result, SCORED),
+        )
+
+    def add_reports(self, reports: list[str]) -> None:
+        """Add the shots of match report XML texts."""
+        tables, rosters, team_ids = [], [], []
+        for text in reports:
+            info = read_report_xml(text)
+            home_ids, away_ids, _, _ = decode_roster(info["report"])
+            tables.append(decode_events(info["report"]))
+            rosters.append([home_ids, away_ids])
+            team_ids.append([int(team.get("ID", 0)) for team in info["teams"]])
+        self.add_matches(tables, rosters, team_ids)
+
+    def compact(self) -> None:
+        """Fold the shots added since into the counts."""
+        if not self.pending:
+            return
+        keys = np.concatenate([self.keys] + [keys for keys, _ in self.pending])
+        counts = np.concatenate([self.counts] + [counts for _, counts in self.pending])
+        self.pending = []
+
+        # np.unique(axis=0) sorts rows as opaque bytes, lexsort is far faster
+        order = np.lexsort(keys.T[::-1])
+        keys = keys[order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = (keys[1:] != keys[:-1]).any(axis=1)
+        inverse = np.empty(len(keys), dtype=np.int64)
+        inverse[order] = np.cumsum(first) - 1
+        self.keys = keys[first]
+        self.counts = np.stack(
+            [
+                np.bincount(inverse, counts[:, 0], len(self.keys)),
+                np.bincount(inverse, counts[:, 1], len(self.keys)),
+            ],
+            axis=1,
+        ).astype(np.int64)
+
+    def __iadd__(self, other: "ShotHeatmap") -> "ShotHeatmap":
+        other.compact()
+        self.pending.append((other.keys, other.counts))
+        return self
+
+    def __getstate__(self):
+        self.compact()
+        return self.__dict__
+
+    def select(self, team=None, player=None, shot_type=None) -> np.ndarray:
+        """Mask of the rows of a team and/or player ID and/or shot type."""
+        self.compact()
+        mask = np.ones(len(self.keys), dtype=bool)
+        if team is not None:
+            mask &= self.keys[:, TEAM] == team
+        if player is not None:
+            mask &= self.keys[:, PLAYER] == player
+        if shot_type is not None:
+            mask &= self.keys[:, TYPE] == TYPE_INDEX[int(shot_type)]
+        return mask
+
+    def grid(self, team=None, player=None, shot_type=None) -> np.ndarray:
+        """Attempts and makes per bin, shaped (2, ROWS, COLS)."""
+        mask = self.select(team, player, shot_type)
+        bins = self.keys[mask, BIN]
+        counts = self.counts[mask]
+        return (
+            np.stack(
+                [
+                    np.bincount(bins, counts[:, 0], ROWS * COLS),
+                    np.bincount(bins, counts[:, 1], ROWS * COLS),
+                ]
+            )
+            .astype(np.int64)
+            .reshape(2, ROWS, COLS)
+        )
+
+    def zones(self, team=None, player=None) -> dict[ShotType, tuple[int, int]]:
+        """Attempts and makes of each shot type."""
+        mask = self.select(team, player)
+        types = self.keys[mask, TYPE]
+        counts = self.counts[mask]
+        attempts = np.bincount(types, counts[:, 0], len(SHOT_TYPES))
+        makes = np.bincount(types, counts[:, 1], len(SHOT_TYPES))
+        return {
+            shot_type: (int(attempts[i]), int(makes[i]))
+            for i, shot_type in enumerate(SHOT_TYPES)
+            if attempts[i]
+        }
+
+    def save(self, path: str) -> None:
+        self.compact()
+        np.savez_compressed(path, keys=self.keys, counts=self.counts)
+
+    @classmethod
+    def load(cls, path: str) -> "ShotHeatmap":
+        heatmap = cls()
+        with np.load(path, allow_pickle=False) as data:
+            heatmap.keys = data["keys"]
+            heatmap.counts = data["counts"]
+        return heatmap
+
+    def render(self, path: str, team=None, player=None, shot_type=None) -> None:
+        """Save a PNG of the court with each bin shaded by its share of the
+        attempts, red for a high and blue for a low FG%."""
+        from PIL import Image
+
+        attempts, makes = self.grid(team, player, shot_type)
+        pct = np.divide(
+            makes, attempts, out=np.zeros(attempts.shape), where=attempts > 0
+        )
+        alpha = np.sqrt(attempts / max(attempts.max(), 1))
+
+        cells = np.zeros((ROWS, COLS, 4), dtype=np.uint8)
+        cells[..., 0] = (255 * pct).astype(np.uint8)
+        cells[..., 2] = (255 * (1 - pct)).astype(np.uint8)
+        cells[..., 3] = (200 * alpha).astype(np.uint8)
+
+        overlay = np.zeros((COURT_HEIGHT, COURT_WIDTH, 4), dtype=np.uint8)
+        scaled = cells.repeat(CELL, axis=0).repeat(CELL, axis=1)
+        overlay[: scaled.shape[0], : scaled.shape[1]] = scaled
+
+        img = court().convert("RGBA")
+        img.alpha_composite(Image.fromarray(overlay, "RGBA"))
+        img.save(path)
+
+
+def heatmap_of(paths: list[str]) -> ShotHeatmap:
+    heatmap = ShotHeatmap()
+    reports = []
+    for path in paths:
+        with open(path, mode="r", encoding="utf-8") as f:
+            reports.append(f.read())
+    heatmap.add_reports(reports)
+    heatmap.compact()
+    return heatmap
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from tabulate import tabulate
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("reports", nargs="+", help="report_<matchid>.xml files")
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--team", type=int, help="Only shots of this team ID")
+    parser.add_argument("--player", type=int, help="Only shots of this player ID")
+    parser.add_argument("--png", help="Render the heatmap to this file")
+    parser.add_argument("--save", help="Save the counts (.npz), e.g. to merge later")
+    parser.add_argument(
+        "--merge", nargs="*", default=[], help="Add counts saved with --save"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    heatmap = ShotHeatmap()
+    chunks = [args.reports[i : i + 500] for i in range(0, len(args.reports), 500)]
+    if args.jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            for part in pool.map(heatmap_of, chunks):
+                heatmap += part
+    else:
+        for chunk in chunks:
+            heatmap += heatmap_of(chunk)
+    for path in args.merge:
+        heatmap += ShotHeatmap.load(path)
+    heatmap.compact()
+    elapsed = time.perf_counter() - start
+
+    zones = heatmap.zones(args.team, args.player)
+    rows = [
+        [shot_type.name, attempts, makes, f"{makes / attempts:.3f}"]
+        for shot_type, (attempts, makes) in zones.items()
+    ]
+    print(tabulate(rows, headers=["Type", "FGA", "FGM", "FG%"]))
+    print(
+        f"{len(args.reports)} reports, {sum(a for a, _ in zones.values())} shots, "
+        f"{len(heatmap.keys)} bins in {elapsed:.3f}s"
+    )
+
+    if args.save:
+        heatmap.save(args.save)
+    if args.png:
+        heatmap.render(args.png, args.team, args.player)
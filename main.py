@@ -1,16 +1,27 @@
 #!/usr/bin/env python3
 
 import argparse
-import requests
-import xml.etree.ElementTree as XML
+import io
+import logging
+import os
+import re
+import time
+from typing import IO, BinaryIO, Optional, Union
 from tabulate import tabulate, SEPARATING_LINE
 
 from game import *
 from event import *
 from player import Player
 from team import Team
+from comments import Comments
+from match_index import MatchIndex
+from match_cache import parse_cached
+from xml_readers import make_team, read_report_xml
+from store import DEFAULT_STORE, Store, open_store, opened
 from bbapi import *
 
+log = logging.getLogger(__name__)
+
 
 def parse_report(report: str, at: Team, ht: Team) -> list[BBEvent]:
     events = []
@@ -39,16 +50,14 @@ def parse_report(report: str, at: Team, ht: Team) -> list[BBEvent]:
     pos = 0
     while i < 197:
         id = int(report[i], 16) - 1
-        if __debug__:
-            print("starter: ", id, f"{ht.players[id]}")
+        log.debug("starter: %d %s", id, ht.players[id])
         ht.set_starter(id, pos)
         i += 1
         pos += 1
     pos = 0
     while i < 202:
         id = int(report[i], 16) - 1
-        if __debug__:
-            print("starter: ", id, f"{at.players[id]}")
+        log.debug("starter: %d %s", id, at.players[id])
         at.set_starter(id, pos)
         i += 1
         pos += 1
@@ -85,7 +94,7 @@ def parse_report(report: str, at: Team, ht: Team) -> list[BBEvent]:
                 result=e.result,
                 player1=e.player1,
                 player2=e.player2,
-                gameclock=e.gameclock.clock,
+                gameclock=e.gameclock,
                 realclock=e.realclock + 2,
                 data="",
             )
@@ -104,98 +113,229 @@ def parse_report(report: str, at: Team, ht: Team) -> list[BBEvent]:
     return events
 
 
-def parse_xml(text: str) -> tuple[list[BBEvent], Team, Team]:
-    tree = XML.ElementTree(XML.fromstring(text))
-    root = tree.getroot()
-
-    ht = Team()
-    at = Team()
-    report = ""
-
-    for child in root:
-        tag = child.tag
-        if tag == "HomeTeam":
-            for team in child:
-                if team.tag == "ID":
-                    assert team.text, "Missing team ID"
-                    ht.id = int(team.text)
-                elif team.tag == "Name":
-                    assert team.text, "Missing team name"
-                    ht.name = team.text
-                elif team.tag == "ShortName":
-                    assert team.text, "Missing team short name"
-                    ht.short = team.text
-        elif tag == "AwayTeam":
-            for team in child:
-                if team.tag == "ID":
-                    assert team.text
-                    at.id = int(team.text)
-                elif team.tag == "Name":
-                    assert team.text
-                    at.name = team.text
-                elif team.tag == "ShortName":
-                    assert team.text
-                    at.short = team.text
-        elif tag.startswith("HPlayer") and not tag.startswith("HPlayerNick"):
-            assert child.text, "Missing HPlayer string"
-            p = Player()
-            p.name = child.text
-            ht.players.append(p)
-        elif tag.startswith("APlayer") and not tag.startswith("APlayerNick"):
-            assert child.text, "Missing APlayer string"
-            p = Player()
-            p.name = child.text
-            at.players.append(p)
-        elif tag == "ReportString":
-            assert child.text, "Missing report string"
-            report = child.text.strip()
-
-    # Fill upto 12 players with empty objects, as the events events apparently reference these.
-    while len(ht.players) < 12:
-        ht.players.append(Player("Lucky Fan"))
-    while len(at.players) < 12:
-        at.players.append(Player("Lucky Fan"))
-
-    events = parse_report(report, at, ht)
+def parse_xml(source: Union[str, IO]) -> tuple[list[BBEvent], Team, Team]:
+    """Events and teams of a report, given as text or streamed from a file."""
+    info = read_report_xml(source)
+    ht = make_team(info["teams"][0], info["players"][0])
+    at = make_team(info["teams"][1], info["players"][1])
+
+    events = parse_report(info["report"], at, ht)
 
     return (events, ht, at)
 
 
-def get_xml_text(matchid) -> str:
-    from os.path import exists
+# Created on first download, reused for every report of a batch.
+report_network: Optional[Network] = None
+
+
+def get_xml_text(matchid, store: Optional[Store] = None) -> str:
+    global report_network
+    if store is None:
+        store = open_store(DEFAULT_STORE)
+
+    name = f"report_{matchid}.xml"
+    text = store.get(name)
+    if text is None:
+        if report_network is None:
+            report_network = Network(base_url="https://buzzerbeater.com/")
+        text = report_network.get("match/viewmatch.aspx", {"matchid": matchid})
+        store.put(name, text)
+
+    return text
+
+
+def open_report(matchid, store: Optional[Store] = None) -> BinaryIO:
+    """The report as a stream, downloaded first if it is not in the store."""
+    if store is None:
+        store = open_store(DEFAULT_STORE)
+
+    stream = store.open(f"report_{matchid}.xml")
+    if stream is None:
+        stream = io.BytesIO(get_xml_text(matchid, store).encode("utf-8"))
+    return stream
 
-    path = f"matches/report_{matchid}.xml"
 
-    if exists(path):
-        with open(path, mode="r", encoding='utf-8') as f:
-            return f.read()
+def read_report_dir(path: str) -> list[tuple[str, str]]:
+    reports = []
+    for name in sorted(os.listdir(path)):
+        m = re.fullmatch(r"report_(\d+)\.xml", name)
+        if m:
+            reports.append((m.group(1), os.path.join(path, name)))
+    return reports
+
+
+def analyze(matchid: str, source: Union[str, IO], args, comments: Comments) -> Game:
+    if args.parse_cache:
+        # Keyed by the hash of the whole text, so it is read in one go here
+        if not isinstance(source, str):
+            source = source.read().decode("utf-8")
+        events, ht, at = parse_cached(matchid, source, args.parse_cache)
     else:
-        data = requests.get(
-            f"https://buzzerbeater.com/match/viewmatch.aspx?matchid={matchid}"
-        )
+        events, ht, at = parse_xml(source)
+    game = Game(matchid, events, ht, at, args, [], comments)
+    game.play()
+    game.save(f"{matchid}.json", indent=args.indent)
+    return game
+
+
+def process_report(
+    matchid: str, path: Optional[str], args, comments: Comments
+) -> tuple[str, int, Optional[str]]:
+    try:
+        if path is None:
+            f = open_report(matchid, open_store(args.store))
+        else:
+            f = open(path, mode="rb")
+
+        with f:
+            game = analyze(matchid, f, args, comments)
+    except Exception as e:
+        return (matchid, 0, repr(e))
+
+    return (matchid, len(game.events), None)
 
-        with open(path, mode="w", encoding='utf-8') as f:
-            f.write(data.text)
 
-        return data.text
+def setup_logging(level: str) -> None:
+    # Debug tracing is off unless asked for, the hot paths check the level
+    # before formatting anything.
+    logging.basicConfig(level=level, format="%(name)s: %(message)s")
+
+
+# Per worker process state, filled once by init_worker.
+worker_args = None
+worker_comments: Optional[Comments] = None
+
+
+def init_worker(args) -> None:
+    global worker_args, worker_comments
+    setup_logging(args.log_level)
+    # Forked workers must not share the parent's open pack file handles
+    opened.clear()
+    worker_args = args
+    worker_comments = Comments()
+
+
+def process_report_worker(report: tuple[str, Optional[str]]):
+    assert worker_comments is not None, "Worker not initialized"
+    return process_report(*report, worker_args, worker_comments)
+
+
+def run_batch(args) -> None:
+    if args.reports_dir:
+        reports = read_report_dir(args.reports_dir)
+    elif args.team is not None:
+        index = MatchIndex(args.index)
+        index.refresh(open_store(args.store))
+        matchids = index.team_matches(args.team, args.season)
+        index.close()
+        reports = [(str(matchid), None) for matchid in matchids]
+    else:
+        reports = [(matchid, None) for matchid in args.matchids]
+
+    start = time.perf_counter()
+
+    if args.jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksize = max(1, len(reports) // (args.jobs * 4))
+        with ProcessPoolExecutor(
+            max_workers=args.jobs, initializer=init_worker, initargs=(args,)
+        ) as pool:
+            # map() yields in submission order, so the merged results do not
+            # depend on which worker finished first.
+            results = list(
+                pool.map(process_report_worker, reports, chunksize=chunksize)
+            )
+    else:
+        # Shared between all matches, so the commentary is parsed only once.
+        comments = Comments()
+        results = [
+            process_report(matchid, path, args, comments) for matchid, path in reports
+        ]
+
+    nmatches = 0
+    nevents = 0
+    failed = []
+    for matchid, count, error in results:
+        if error is not None:
+            print(f"Match {matchid} failed: {error}")
+            failed.append(matchid)
+            continue
+
+        nmatches += 1
+        nevents += count
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(
+        f"Processed {nmatches} matches ({nevents} events) in {elapsed:.2f}s: "
+        f"{nmatches / elapsed:.1f} matches/s, {nevents / elapsed:.0f} events/s"
+    )
+    if failed:
+        print(f"Failed {len(failed)} matches: {' '.join(failed)}")
 
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--matchid", help="Match ID", required=True)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--matchid", help="Match ID")
+    source.add_argument("--matchids", nargs="+", help="Match IDs to analyze in batch")
+    source.add_argument(
+        "--reports-dir", help="Analyze every report_<matchid>.xml in directory"
+    )
+    source.add_argument(
+        "--team", type=int, help="Analyze the league matches of a team (see --season)"
+    )
+    parser.add_argument("--season", type=int, help="Season for --team")
+    parser.add_argument(
+        "--index",
+        default="matches.sqlite",
+        help="Schedule index for --team, refreshed from the cached schedules",
+    )
     parser.add_argument("--username", help="BBAPI username")
     parser.add_argument("--password", help="BBAPI password")
     parser.add_argument("--print-events", action="store_true")
     parser.add_argument("--print-stats", action="store_true")
     parser.add_argument("--save-charts", action="store_true")
     parser.add_argument("--verify", action="store_true")
+    parser.add_argument(
+        "--no-commentary",
+        action="store_true",
+        help="Stats only, do not render or save event comments",
+    )
+    parser.add_argument(
+        "--indent", type=int, help="Indent the saved JSON, it is compact by default"
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="Worker processes for batch mode"
+    )
+    parser.add_argument(
+        "--store",
+        default=DEFAULT_STORE,
+        help="Where reports are cached: dir:<path>, gzip:<path>, zstd:<path> "
+        "or pack:<path> (see store.py)",
+    )
+    parser.add_argument(
+        "--parse-cache",
+        metavar="DIR",
+        help="Keep decoded reports in DIR and skip parsing unchanged ones",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="DEBUG traces every stat, substitution and comment",
+    )
     args = parser.parse_args()
+    if args.season is not None and args.team is None:
+        parser.error("--season only applies to --team")
+    setup_logging(args.log_level)
 
-    text = get_xml_text(args.matchid)
-    events, ht, at = parse_xml(text)
-    game = Game(args.matchid, events, ht, at, args, [])
-    game.play()
-    game.save(f"{args.matchid}.json")
+    if args.matchid is None:
+        run_batch(args)
+        return
+
+    with open_report(args.matchid, open_store(args.store)) as f:
+        analyze(args.matchid, f, args, Comments())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,122 @@
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+
+from event import BBEvent
+from event_table import EVENT_DTYPE, decode_events, decode_roster, to_bbevents
+from store import write_atomic
+from team import Team
+from xml_readers import make_team, read_report_xml
+
+# Bump whenever the cached layout or the decoding rules change.
+PARSED_VERSION = 1
+
+
+def source_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def make_teams(meta: dict, roster: np.ndarray, starters: np.ndarray) -> list[Team]:
+    teams = []
+    for side in range(2):
+        team = make_team(meta["teams"][side], meta["players"][side])
+        for index, id in enumerate(roster[side].tolist()):
+            team.players[index].id = id
+        for pos, index in enumerate(starters[side].tolist()):
+            team.set_starter(index, pos)
+        teams.append(team)
+    return teams
+
+
+def save_parsed(path: str, digest: str, meta: dict, roster, starters, table) -> None:
+    meta = dict(meta, version=PARSED_VERSION, source=digest)
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        meta=np.frombuffer(json.dumps(meta).encode("utf-8"), np.uint8),
+        roster=roster,
+        starters=starters,
+        events=table,
+    )
+    write_atomic(path, buffer.getvalue())
+
+
+def load_parsed(path: str, digest: str):
+    """Cached (meta, roster, starters, events table), None when missing or
+    made from a different report text or by an older version."""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            if meta.get("version") != PARSED_VERSION or meta.get("source") != digest:
+                return None
+            table = data["events"]
+            if table.dtype != EVENT_DTYPE:
+                return None
+            return meta, data["roster"], data["starters"], table
+    except Exception:
+        # Missing, empty, truncated or otherwise unreadable, parse again and
+        # the entry is rewritten
+        return None
+
+
+def parse_cached(
+    matchid: str, text: str, cache_dir: str
+) -> tuple[list[BBEvent], Team, Team]:
+    """parse_xml with the decoded report cached in cache_dir/<matchid>.npz.
+
+    The cache entry is only used if it was made from the same report text, so
+    a re-downloaded report is parsed again.
+    """
+    digest = source_hash(text)
+    path = os.path.join(cache_dir, f"{matchid}.npz")
+
+    cached = load_parsed(path, digest)
+    if cached is not None:
+        meta, roster, starters, table = cached
+    else:
+        meta = read_report_xml(text)
+        report = meta.pop("report")
+        home_ids, away_ids, home_starters, away_starters = decode_roster(report)
+        roster = np.stack([home_ids, away_ids])
+        starters = np.stack([home_starters, away_starters])
+        table = decode_events(report)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        save_parsed(path, digest, meta, roster, starters, table)
+
+    ht, at = make_teams(meta, roster, starters)
+    return to_bbevents(table), ht, at
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from main import parse_xml, read_report_dir
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dir", default="matches", help="Directory with reports")
+    parser.add_argument("--cache-dir", default=".parsed")
+    args = parser.parse_args()
+
+    reports = []
+    for matchid, path in read_report_dir(args.dir):
+        with open(path, mode="r", encoding="utf-8") as f:
+            reports.append((matchid, f.read()))
+
+    def timed(fn):
+        start = time.perf_counter()
+        for matchid, text in reports:
+            fn(matchid, text)
+        return time.perf_counter() - start
+
+    xml = timed(lambda matchid, text: parse_xml(text))
+    cold = timed(lambda matchid, text: parse_cached(matchid, text, args.cache_dir))
+    warm = timed(lambda matchid, text: parse_cached(matchid, text, args.cache_dir))
+    print(
+        f"{len(reports)} reports: parse_xml {xml * 1000:.1f} ms, "
+        f"cache write {cold * 1000:.1f} ms, cache load {warm * 1000:.1f} ms"
+    )
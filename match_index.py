@@ -0,0 +1,306 @@
+import re
+import sqlite3
+import xml.etree.ElementTree as XML
+from typing import Optional
+
+from store import Store
+
+# Bump whenever the tables change, older index files are rebuilt from scratch.
+INDEX_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    name TEXT PRIMARY KEY,
+    stamp TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    match_id INTEGER PRIMARY KEY,
+    season INTEGER,
+    type TEXT,
+    start TEXT,
+    away_id INTEGER,
+    away_name TEXT,
+    away_score INTEGER,
+    home_id INTEGER,
+    home_name TEXT,
+    home_score INTEGER
+);
+CREATE INDEX IF NOT EXISTS matches_away ON matches (away_id, season);
+CREATE INDEX IF NOT EXISTS matches_home ON matches (home_id, season);
+CREATE INDEX IF NOT EXISTS matches_season ON matches (season, type);
+-- Both teams' schedules list a match, it is kept while either one does
+CREATE TABLE IF NOT EXISTS schedule_matches (
+    source TEXT,
+    match_id INTEGER,
+    PRIMARY KEY (source, match_id)
+);
+CREATE TABLE IF NOT EXISTS standings (
+    league_id INTEGER,
+    season INTEGER,
+    team_id INTEGER,
+    conference INTEGER,
+    team_name TEXT,
+    wins INTEGER,
+    losses INTEGER,
+    pf INTEGER,
+    pa INTEGER,
+    source TEXT,
+    PRIMARY KEY (league_id, season, team_id)
+);
+CREATE INDEX IF NOT EXISTS standings_source ON standings (source);
+CREATE INDEX IF NOT EXISTS standings_team ON standings (team_id, season);
+"""
+
+SOURCE_PATTERN = re.compile(r"(schedule|standings)_(\d+)_(\d+)\.xml")
+
+
+def optional_int(text: Optional[str]) -> Optional[int]:
+    return int(text) if text else None
+
+
+def read_schedule_rows(source, season: int) -> list[tuple]:
+    """matches rows of a schedule.aspx response, unplayed ones without scores."""
+    rows = []
+    fields: dict = {}
+    side = ""
+    depth = 0
+    for event, elem in XML.iterparse(source, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 2 and elem.tag == "schedule" and "season" in elem.attrib:
+                season = int(elem.attrib["season"])
+            elif depth == 3 and elem.tag == "match":
+                fields = {
+                    "match_id": int(elem.attrib["id"]),
+                    "type": elem.attrib.get("type"),
+                    "start": elem.attrib.get("start"),
+                }
+            elif depth == 4 and elem.tag in ("awayTeam", "homeTeam"):
+                side = elem.tag[:4]
+                fields[side + "_id"] = int(elem.attrib["id"])
+            continue
+
+        if depth == 5 and elem.tag == "teamName":
+            fields[side + "_name"] = elem.text
+        elif depth == 5 and elem.tag == "score":
+            fields[side + "_score"] = optional_int(elem.text)
+        elif depth == 3 and elem.tag == "match":
+            rows.append(
+                (
+                    fields["match_id"],
+                    season,
+                    fields["type"],
+                    fields["start"],
+                    fields.get("away_id"),
+                    fields.get("away_name"),
+                    fields.get("away_score"),
+                    fields.get("home_id"),
+                    fields.get("home_name"),
+                    fields.get("home_score"),
+                )
+            )
+            elem.clear()
+        depth -= 1
+    return rows
+
+
+def read_standings_rows(source, league_id: int, season: int) -> list[tuple]:
+    """standings rows of a standings.aspx response (regular season)."""
+    rows = []
+    fields: dict = {}
+    conference = -1
+    depth = 0
+    for event, elem in XML.iterparse(source, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 2 and elem.tag == "standings" and "season" in elem.attrib:
+                season = int(elem.attrib["season"])
+            elif depth == 3 and elem.tag == "league" and "id" in elem.attrib:
+                league_id = int(elem.attrib["id"])
+            elif depth == 4 and elem.tag == "conference":
+                conference += 1
+            elif depth == 5 and elem.tag == "team":
+                fields = {"team_id": int(elem.attrib["id"])}
+            continue
+
+        if depth == 6 and fields:
+            fields[elem.tag] = elem.text
+        elif depth == 5 and elem.tag == "team":
+            rows.append(
+                (
+                    league_id,
+                    season,
+                    fields["team_id"],
+                    conference,
+                    fields.get("teamName"),
+                    optional_int(fields.get("wins")),
+                    optional_int(fields.get("losses")),
+                    optional_int(fields.get("pf")),
+                    optional_int(fields.get("pa")),
+                )
+            )
+            fields = {}
+            elem.clear()
+        depth -= 1
+    return rows
+
+
+class MatchIndex:
+    """SQLite index over the cached schedule and standings responses."""
+
+    def __init__(self, path: str = "matches.sqlite") -> None:
+        self.db = sqlite3.connect(path)
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version != INDEX_VERSION:
+            with self.db:
+                for table in ("sources", "matches", "schedule_matches", "standings"):
+                    self.db.execute(f"DROP TABLE IF EXISTS {table}")
+                self.db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def forget(self, name: str) -> None:
+        """Drop what was indexed from a schedule or standings entry."""
+        self.db.execute("DELETE FROM schedule_matches WHERE source = ?", (name,))
+        self.db.execute("DELETE FROM standings WHERE source = ?", (name,))
+        self.db.execute("DELETE FROM sources WHERE name = ?", (name,))
+
+    def refresh(self, store: Store) -> int:
+        """Index every schedule and standings entry that is new or changed
+        since the last refresh, and drop the rows of changed or removed ones
+        first. Returns the number of entries read."""
+        known = dict(self.db.execute("SELECT name, stamp FROM sources"))
+        count = 0
+
+        with self.db:
+            for name in store.names():
+                m = SOURCE_PATTERN.fullmatch(name)
+                if m is None:
+                    continue
+                stamp = store.stamp(name)
+                if known.pop(name, None) == stamp:
+                    continue
+
+                kind, id, season = m.group(1), int(m.group(2)), int(m.group(3))
+                stream = store.open(name)
+                if stream is None:
+                    continue
+                self.forget(name)
+                with stream:
+                    if kind == "schedule":
+                        rows = read_schedule_rows(stream, season)
+                        self.db.executemany(
+                            "INSERT OR REPLACE INTO matches VALUES "
+                            "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            rows,
+                        )
+                        self.db.executemany(
+                            "INSERT OR IGNORE INTO schedule_matches VALUES (?, ?)",
+                            [(name, row[0]) for row in rows],
+                        )
+                    else:
+                        self.db.executemany(
+                            "INSERT OR REPLACE INTO standings VALUES "
+                            "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            [
+                                row + (name,)
+                                for row in read_standings_rows(stream, id, season)
+                            ],
+                        )
+                self.db.execute(
+                    "INSERT OR REPLACE INTO sources VALUES (?, ?)", (name, stamp)
+                )
+                count += 1
+
+            # What is left of known is gone from the store
+            for name in known:
+                self.forget(name)
+            if count or known:
+                self.db.execute(
+                    "DELETE FROM matches WHERE match_id NOT IN "
+                    "(SELECT match_id FROM schedule_matches)"
+                )
+
+        return count
+
+    def team_matches(
+        self, team_id: int, season: Optional[int] = None, type: str = "league"
+    ) -> list[int]:
+        """IDs of the matches team_id played, e.g. league ones, by start time.
+        type is a prefix, "" selects every match."""
+        query = (
+            "SELECT match_id FROM matches WHERE (home_id = ?1 OR away_id = ?1) "
+            "AND substr(type, 1, length(?2)) = ?2"
+        )
+        params: list = [team_id, type]
+        if season is not None:
+            query += " AND season = ?3"
+            params.append(season)
+        query += " ORDER BY start, match_id"
+        return [row[0] for row in self.db.execute(query, params)]
+
+    def season_matches(self, season: int, type: str = "league") -> list[int]:
+        return [
+            row[0]
+            for row in self.db.execute(
+                "SELECT match_id FROM matches WHERE season = ?1 "
+                "AND substr(type, 1, length(?2)) = ?2 "
+                "ORDER BY start, match_id",
+                (season, type),
+            )
+        ]
+
+    def match(self, match_id: int) -> Optional[dict]:
+        cursor = self.db.execute(
+            "SELECT * FROM matches WHERE match_id = ?", (match_id,)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def standings(self, league_id: int, season: int) -> list[int]:
+        """Team IDs in the order BBApi.standings returns them."""
+        return [
+            row[0]
+            for row in self.db.execute(
+                "SELECT team_id FROM standings WHERE league_id = ? AND season = ? "
+                "ORDER BY conference, rowid",
+                (league_id, season),
+            )
+        ]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from store import DEFAULT_STORE, open_store
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default="matches.sqlite")
+    parser.add_argument("--store", default=DEFAULT_STORE)
+    parser.add_argument("--team", type=int, help="List the matches of a team")
+    parser.add_argument("--season", type=int)
+    parser.add_argument("--type", default="league", help="Match type prefix")
+    args = parser.parse_args()
+
+    index = MatchIndex(args.db)
+
+    start = time.perf_counter()
+    count = index.refresh(open_store(args.store))
+    print(
+        f"Indexed {count} new or changed entries in {time.perf_counter() - start:.3f}s"
+    )
+
+    if args.team is not None:
+        start = time.perf_counter()
+        match_ids = index.team_matches(args.team, args.season, args.type)
+        elapsed = time.perf_counter() - start
+        print(f"{len(match_ids)} matches in {elapsed * 1000:.2f} ms")
+        print(" ".join(str(id) for id in match_ids))
+    elif args.season is not None:
+        match_ids = index.season_matches(args.season, args.type)
+        print(" ".join(str(id) for id in match_ids))
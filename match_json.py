@@ -0,0 +1,51 @@
+import json
+from typing import BinaryIO, Callable, Iterable, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Events are serialized this many at a time
+BATCH_SIZE = 256
+
+
+def json_dumps(obj) -> bytes:
+    """Compact UTF-8 JSON by the json module."""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj) -> bytes:
+    """Compact UTF-8 JSON, by orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json_dumps(obj)
+
+
+def write_game(
+    f: BinaryIO,
+    teams: list[dict],
+    events: Iterable[Optional[dict]],
+    dumps: Callable[[object], bytes] = dumps,
+):
+    """Write a saved game to a binary file, events are taken from the
+    iterable in batches so all their dicts never exist at once. dumps turns
+    an object into compact UTF-8 JSON."""
+    f.write(b'{"teamHome":')
+    f.write(dumps(teams[0]))
+    f.write(b',"teamAway":')
+    f.write(dumps(teams[1]))
+    f.write(b',"events":[')
+
+    sep = b""
+    batch = []
+    for event in events:
+        batch.append(event)
+        if len(batch) == BATCH_SIZE:
+            # A list dumps as its items joined by commas within brackets
+            f.write(sep + dumps(batch)[1:-1])
+            sep = b","
+            batch = []
+    if batch:
+        f.write(sep + dumps(batch)[1:-1])
+    f.write(b"]}")
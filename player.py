@@ -1,3 +1,4 @@
+from typing import Optional
 from stats import Stats, Statistic
 
 
@@ -8,9 +9,20 @@ class Player:
         self.stats = Stats()
         self.starter = False
 
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @name.setter
+    def name(self, name: str) -> None:
+        self._name = name
+        self._shortened_name: Optional[str] = None
+
     def get_shortened_name(self) -> str:
-        full_name = self.name.split(" ")
-        return full_name[0][0] + ". " + " ".join(full_name[1:])
+        if self._shortened_name is None:
+            full_name = self.name.split(" ")
+            self._shortened_name = full_name[0][0] + ". " + " ".join(full_name[1:])
+        return self._shortened_name
 
     def __repr__(self) -> str:
         return f"{self.id}: {self.name}"
@@ -19,10 +31,4 @@ class Player:
         self.stats.add(stat, val)
 
     def secs_total(self):
-        return (
-            self.stats.full.sheet[Statistic.SecsPG]
-            + self.stats.full.sheet[Statistic.SecsSG]
-            + self.stats.full.sheet[Statistic.SecsSF]
-            + self.stats.full.sheet[Statistic.SecsPF]
-            + self.stats.full.sheet[Statistic.SecsC]
-        )
+        return self.stats.full.seconds()
@@ -1,18 +1,106 @@
-from PIL import Image, ImageDraw
+from array import array
+from typing import Iterable
+
+import numpy as np
+
+COURT_PATH = "court.png"
+# Size of court.png, the shot coordinates are in its pixels
+COURT_WIDTH = 368
+COURT_HEIGHT = 192
+
+_court = None
+
+
+def court():
+    # Decoded once per process, every chart is rendered on its own copy. PIL
+    # is only imported once a chart is actually drawn.
+    global _court
+    if _court is None:
+        from PIL import Image
+
+        _court = Image.open(COURT_PATH)
+        _court.load()
+    return _court
 
 
 class ShotChart:
+    """Shot locations of a team, recorded during play and drawn on save."""
+
     def __init__(self) -> None:
-        self.img = Image.open("court.png")
-        self.img_draw = ImageDraw.Draw(self.img)
+        self.x = array("h")
+        self.y = array("h")
+        self.made = array("b")
+
+    def __len__(self) -> int:
+        return len(self.made)
 
     def add_made(self, x, y):
-        self.img_draw.ellipse(
-            [(x - 2, y - 2), (x + 2, y + 2)], fill=None, outline="black", width=1
-        )
+        self.x.append(x)
+        self.y.append(y)
+        self.made.append(1)
 
     def add_miss(self, x, y):
-        self.img_draw.text((x - 5, y - 5), text="X")
+        self.x.append(x)
+        self.y.append(y)
+        self.made.append(0)
+
+    def extend(self, other: "ShotChart") -> None:
+        self.x.extend(other.x)
+        self.y.extend(other.y)
+        self.made.extend(other.made)
+
+    def snapshot(self) -> tuple:
+        return self.x[:], self.y[:], self.made[:]
+
+    def restore(self, state: tuple) -> None:
+        x, y, made = state
+        self.x, self.y, self.made = x[:], y[:], made[:]
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """x, y and made as numpy views of the recorded shots."""
+        return (
+            np.frombuffer(self.x, dtype=np.int16),
+            np.frombuffer(self.y, dtype=np.int16),
+            np.frombuffer(self.made, dtype=np.int8).astype(bool),
+        )
+
+    def histogram(self, cell: int = 8) -> tuple[np.ndarray, np.ndarray]:
+        """Attempts and makes per cell x cell pixel square of the court,
+        both shaped (rows, columns)."""
+        x, y, made = self.arrays()
+        bins = (
+            np.arange(0, COURT_HEIGHT + cell, cell),
+            np.arange(0, COURT_WIDTH + cell, cell),
+        )
+        attempts = np.histogram2d(y, x, bins)[0].astype(np.int64)
+        makes = np.histogram2d(y[made], x[made], bins)[0].astype(np.int64)
+        return attempts, makes
+
+    def render(self):
+        """The chart as a PIL image."""
+        from PIL import ImageDraw
+
+        img = court().copy()
+        draw = ImageDraw.Draw(img)
+        for x, y, made in zip(self.x, self.y, self.made):
+            if made:
+                draw.ellipse(
+                    [(x - 2, y - 2), (x + 2, y + 2)],
+                    fill=None,
+                    outline="black",
+                    width=1,
+                )
+            else:
+                draw.text((x - 5, y - 5), text="X")
+        return img
 
     def save(self, name):
-        self.img.save(name)
+        self.render().save(name)
+
+
+def merge(charts: Iterable[ShotChart]) -> ShotChart:
+    """All shots of many charts, e.g. a team's season."""
+    total = ShotChart()
+    for chart in charts:
+        total.extend(chart)
+    return total
@@ -1,4 +1,9 @@
+import unittest
+from array import array
 from enum import IntEnum
+from typing import Iterable, Optional
+
+import numpy as np
 
 
 class Statistic(IntEnum):
@@ -38,9 +43,65 @@ class Statistic(IntEnum):
     TeamStats = 32
 
 
+# Seconds played on each position, the minutes are their sum
+POSITION_SECS = [
+    Statistic.SecsPG,
+    Statistic.SecsSG,
+    Statistic.SecsSF,
+    Statistic.SecsPF,
+    Statistic.SecsC,
+]
+
+_ZEROS = array("q", bytes(8 * Statistic.TeamStats))
+
+
 class StatSheet:
-    def __init__(self) -> None:
-        self.sheet = [0] * Statistic.TeamStats
+    def __init__(self, values: Optional[Iterable[int]] = None) -> None:
+        # int64 buffer, values() views it as a numpy array without a copy
+        if values is None:
+            self.sheet = array("q", _ZEROS)
+        elif isinstance(values, np.ndarray):
+            self.sheet = array("q", values.astype(np.int64).tobytes())
+        else:
+            self.sheet = array("q", values)
+        assert len(self.sheet) == Statistic.TeamStats
+
+    def values(self) -> np.ndarray:
+        """The sheet as a numpy array, writes go to the sheet."""
+        return np.frombuffer(self.sheet, dtype=np.int64)
+
+    def __add__(self, other: "StatSheet") -> "StatSheet":
+        return StatSheet(self.values() + other.values())
+
+    def __iadd__(self, other: "StatSheet") -> "StatSheet":
+        values = self.values()
+        values += other.values()
+        return self
+
+    def __sub__(self, other: "StatSheet") -> "StatSheet":
+        return StatSheet(self.values() - other.values())
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, StatSheet):
+            return NotImplemented
+        return self.sheet == other.sheet
+
+    def seconds(self) -> int:
+        return sum(self.sheet[stat] for stat in POSITION_SECS)
+
+    def per_36(self) -> np.ndarray:
+        """Every stat per 36 minutes played, zeros for a player who did not
+        play. Only meaningful for player sheets."""
+        seconds = self.seconds()
+        if seconds == 0:
+            return np.zeros(Statistic.TeamStats)
+        return self.values() * (36 * 60 / seconds)
+
+    def per_possession(self, possessions: int, per: int = 100) -> np.ndarray:
+        """Every stat per `per` possessions."""
+        if possessions == 0:
+            return np.zeros(Statistic.TeamStats)
+        return self.values() * (per / possessions)
 
     def __repr__(self) -> str:
         return f"""Stats
@@ -138,13 +199,20 @@ class StatSheet:
         }
 
     def minutes(self):
-        return (
-            round(self.sheet[Statistic.SecsPG] / 60)
-            + round(self.sheet[Statistic.SecsSG] / 60)
-            + round(self.sheet[Statistic.SecsSF] / 60)
-            + round(self.sheet[Statistic.SecsPF] / 60)
-            + round(self.sheet[Statistic.SecsC] / 60)
-        )
+        return sum(round(self.sheet[stat] / 60) for stat in POSITION_SECS)
+
+
+def stat_matrix(sheets: Iterable[StatSheet]) -> np.ndarray:
+    """Sheets stacked into a (sheets, Statistic.TeamStats) array."""
+    rows = [sheet.sheet for sheet in sheets]
+    if not rows:
+        return np.zeros((0, Statistic.TeamStats), dtype=np.int64)
+    return np.frombuffer(b"".join(rows), dtype=np.int64).reshape(len(rows), -1)
+
+
+def merge(sheets: Iterable[StatSheet]) -> StatSheet:
+    """Sum of many sheets, e.g. the games of a season."""
+    return StatSheet(stat_matrix(sheets).sum(axis=0))
 
 
 class Stats:
@@ -152,9 +220,33 @@ class Stats:
         self.full = StatSheet()
         self.qtr: list[StatSheet] = []
 
+    def matrix(self) -> np.ndarray:
+        """The quarter sheets as a (quarters, Statistic.TeamStats) array."""
+        return stat_matrix(self.qtr)
+
+    def merge(self, other: "Stats") -> None:
+        """Add the stats of another game, overtimes included."""
+        self.full += other.full
+        for num, qtr in enumerate(other.qtr):
+            if num == len(self.qtr):
+                self.new_qtr_sheet()
+            self.qtr[num] += qtr
+
     def add(self, stat: Statistic, val: int):
         self.full.sheet[stat] += val
         self.qtr[-1].sheet[stat] += val
 
     def new_qtr_sheet(self):
         self.qtr.append(StatSheet())
+
+    def snapshot(self) -> tuple:
+        return self.full.sheet[:], [qtr.sheet[:] for qtr in self.qtr]
+
+    def restore(self, state: tuple) -> None:
+        full, qtrs = state
+        self.full.sheet = full[:]
+        self.qtr = []
+        for sheet in qtrs:
+            qtr = StatSheet()
+            qtr.sheet = sheet[:]
+            self.qtr.append(qtr)
@@ -0,0 +1,367 @@
+import gzip
+import hashlib
+import io
+import os
+import re
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Names are the file names the matches/ directory always used, e.g.
+# report_123786926.xml, boxscore_123786926.xml or standings_1_59.xml.
+NAME_PATTERN = re.compile(r"([a-z]+)_([0-9_]+)\.xml")
+
+
+class Store(ABC):
+    """Text blobs (API responses, match reports) by name."""
+
+    @abstractmethod
+    def get(self, name: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def put(self, name: str, text: str) -> None:
+        pass
+
+    @abstractmethod
+    def names(self) -> Iterator[str]:
+        pass
+
+    def stamp(self, name: str) -> str:
+        """Changes whenever the entry is rewritten, for incremental indexing."""
+        text = self.get(name)
+        return "" if text is None else hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def open(self, name: str) -> Optional[BinaryIO]:
+        """The entry as a binary stream, for parsers that read incrementally."""
+        text = self.get(name)
+        return None if text is None else io.BytesIO(text.encode("utf-8"))
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    # Readers never see a half written file, even if the writer is killed.
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, mode="wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def file_stamp(path: str) -> str:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return ""
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+class DirStore(Store):
+    """One plain file per name in a flat directory, the original layout."""
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def get(self, name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, name), mode="r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def open(self, name: str) -> Optional[BinaryIO]:
+        try:
+            return open(os.path.join(self.root, name), mode="rb")
+        except FileNotFoundError:
+            return None
+
+    def put(self, name: str, text: str) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        write_atomic(os.path.join(self.root, name), text.encode("utf-8"))
+
+    def names(self) -> Iterator[str]:
+        for name in sorted(os.listdir(self.root)):
+            if NAME_PATTERN.fullmatch(name):
+                yield name
+
+    def __contains__(self, name: str) -> bool:
+        return os.path.exists(os.path.join(self.root, name))
+
+    def stamp(self, name: str) -> str:
+        return file_stamp(os.path.join(self.root, name))
+
+
+class ShardedStore(Store):
+    """Compressed files in root/<kind>/<xx>/<yy>/, sharded by the match or
+    team ID so no directory grows past a few hundred entries.
+
+    The shards use the last digits of the ID, IDs are handed out
+    sequentially so those are the evenly spread ones.
+    """
+
+    def __init__(self, root: str, codec: str = "gzip", level: int = 6) -> None:
+        self.root = root
+        self.codec = codec
+        self.level = level
+        if codec == "gzip":
+            self.suffix = ".gz"
+        elif codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("zstd store needs the zstandard package")
+            self.suffix = ".zst"
+        else:
+            raise ValueError(f"Unknown codec: {codec}")
+
+    def path(self, name: str) -> str:
+        m = NAME_PATTERN.fullmatch(name)
+        if m is None:
+            raise ValueError(f"Unsupported name: {name}")
+        kind, key = m.groups()
+        digits = key.split("_")[0].rjust(4, "0")
+        return os.path.join(
+            self.root, kind, digits[-2:], digits[-4:-2], name + self.suffix
+        )
+
+    def compress(self, data: bytes) -> bytes:
+        if self.codec == "gzip":
+            return gzip.compress(data, self.level, mtime=0)
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        if self.codec == "gzip":
+            return gzip.decompress(data)
+        return zstandard.ZstdDecompressor().decompress(data)
+
+    def get(self, name: str) -> Optional[str]:
+        try:
+            with open(self.path(name), mode="rb") as f:
+                return self.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            return None
+
+    def open(self, name: str) -> Optional[BinaryIO]:
+        path = self.path(name)
+        try:
+            if self.codec == "gzip":
+                return gzip.open(path, mode="rb")
+            f = open(path, mode="rb")
+        except FileNotFoundError:
+            return None
+        return zstandard.ZstdDecompressor().stream_reader(f, closefd=True)
+
+    def put(self, name: str, text: str) -> None:
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, self.compress(text.encode("utf-8")))
+
+    def names(self) -> Iterator[str]:
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.endswith(self.suffix):
+                    yield filename[: -len(self.suffix)]
+
+    def __contains__(self, name: str) -> bool:
+        return os.path.exists(self.path(name))
+
+    def stamp(self, name: str) -> str:
+        return file_stamp(self.path(name))
+
+
+class PackStore(Store):
+    """Append-only pack file of zlib compressed records plus an index.
+
+    <path>.pack holds the records back to back. <path>.idx has one
+    "name offset length" line per record and is appended after the record is
+    written, so a torn last line (crash mid write) is just ignored on load and
+    the record fetched again. A name written twice resolves to the last copy.
+
+    Several processes (main.py --jobs) may share a pack. Appends hold an
+    flock on the pack file and first read the index lines the others added,
+    so each offset is taken under the lock and names a complete record.
+    """
+
+    def __init__(self, path: str, level: int = 6) -> None:
+        self.pack_path = path + ".pack"
+        self.index_path = path + ".idx"
+        self.level = level
+        self.lock = threading.Lock()
+        self.index: dict[str, tuple[int, int]] = {}
+        self.index_end = 0  # bytes of the index file read so far
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.pack = open(self.pack_path, mode="a+b")
+        self.index_file = open(self.index_path, mode="ab")
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Load index lines appended since the last call, by any process."""
+        with open(self.index_path, mode="rb") as f:
+            f.seek(self.index_end)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self.index_end += len(line)
+                fields = line.split()
+                if len(fields) == 3:
+                    name, offset, length = fields
+                    self.index[name.decode("utf-8")] = (int(offset), int(length))
+
+    def entry(self, name: str) -> Optional[tuple[int, int]]:
+        entry = self.index.get(name)
+        if entry is None:
+            with self.lock:
+                self.refresh()
+            entry = self.index.get(name)
+        return entry
+
+    def get(self, name: str) -> Optional[str]:
+        entry = self.entry(name)
+        if entry is None:
+            return None
+        offset, length = entry
+        with self.lock:
+            self.pack.seek(offset)
+            data = self.pack.read(length)
+        return zlib.decompress(data).decode("utf-8")
+
+    def put(self, name: str, text: str) -> None:
+        data = zlib.compress(text.encode("utf-8"), self.level)
+        with self.lock:
+            if fcntl is not None:
+                fcntl.flock(self.pack.fileno(), fcntl.LOCK_EX)
+            try:
+                self.refresh()
+                offset = self.pack.seek(0, os.SEEK_END)
+                self.pack.write(data)
+                self.pack.flush()
+
+                line = f"{name} {offset} {len(data)}\n".encode("utf-8")
+                if os.fstat(self.index_file.fileno()).st_size > self.index_end:
+                    line = b"\n" + line  # end a line torn by a crash
+                self.index_file.write(line)
+                self.index_file.flush()
+                self.refresh()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self.pack.fileno(), fcntl.LOCK_UN)
+
+    def names(self) -> Iterator[str]:
+        return iter(sorted(self.index))
+
+    def __contains__(self, name: str) -> bool:
+        return self.entry(name) is not None
+
+    def stamp(self, name: str) -> str:
+        # Records are never rewritten in place, a new copy has a new offset
+        offset, length = self.entry(name) or (-1, 0)
+        return f"{offset}:{length}"
+
+    def close(self) -> None:
+        self.pack.close()
+        self.index_file.close()
+
+
+# One instance per spec and process, a PackStore index is loaded only once.
+opened: dict[str, Store] = {}
+
+
+def open_store(spec: str) -> Store:
+    """Store from a "<kind>:<path>" spec: dir:matches, gzip:store,
+    zstd:store or pack:store/matches. A bare path is a DirStore."""
+    store = opened.get(spec)
+    if store is not None:
+        return store
+
+    kind, sep, path = spec.partition(":")
+    if not sep:
+        kind, path = "dir", spec
+
+    if kind == "dir":
+        store = DirStore(path)
+    elif kind in ("gzip", "zstd"):
+        store = ShardedStore(path, kind)
+    elif kind == "pack":
+        store = PackStore(path)
+    else:
+        raise ValueError(f"Unknown store: {spec}")
+
+    opened[spec] = store
+    return store
+
+
+DEFAULT_STORE = "dir:matches"
+
+
+def disk_usage(store: Store) -> tuple[int, int]:
+    """Bytes and number of files the store occupies."""
+    if isinstance(store, PackStore):
+        paths = [store.pack_path, store.index_path]
+    else:
+        paths = [
+            os.path.join(dirpath, filename)
+            for dirpath, _, filenames in os.walk(store.root)
+            for filename in filenames
+        ]
+    return sum(os.path.getsize(path) for path in paths), len(paths)
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    migrate = sub.add_parser("migrate", help="Copy every entry to another store")
+    migrate.add_argument("source", help="e.g. dir:matches")
+    migrate.add_argument("dest", help="e.g. pack:store/matches")
+
+    bench = sub.add_parser("bench", help="Read throughput of stores")
+    bench.add_argument("stores", nargs="+")
+    bench.add_argument("--random", action="store_true", help="Random read order")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        source = open_store(args.source)
+        dest = open_store(args.dest)
+        count = 0
+        for name in source.names():
+            if name not in dest:
+                dest.put(name, source.get(name))
+                count += 1
+        print(f"Copied {count} entries from {args.source} to {args.dest}")
+
+    elif args.command == "bench":
+        for spec in args.stores:
+            store = open_store(spec)
+            names = list(store.names())
+            if args.random:
+                random.shuffle(names)
+
+            start = time.perf_counter()
+            nbytes = sum(len(store.get(name)) for name in names)
+            elapsed = max(time.perf_counter() - start, 1e-9)
+
+            size, files = disk_usage(store)
+            print(
+                f"{spec}: {len(names)} entries in {files} files, "
+                f"{size / 2**20:.1f} MiB on disk, "
+                f"{len(names) / elapsed:.0f} reads/s, "
+                f"{nbytes / 2**20 / elapsed:.1f} MiB/s"
+            )
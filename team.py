@@ -1,4 +1,8 @@
+import logging
 from ast import BitAnd
+
+import numpy as np
+
 from player import Player
 from stats import Stats, Statistic
 from typing import Optional
@@ -6,6 +10,8 @@ from tabulate import tabulate, SEPARATING_LINE
 from event_types import *
 from shot_chart import ShotChart
 
+log = logging.getLogger(__name__)
+
 
 def opponent(team: int) -> int:
     return (team + 1) % 2
@@ -22,7 +28,6 @@ class Team:
         self.last_update = 0
         self.shot_chart = ShotChart()
 
-        self.verbose = True
         self.off_strategy = "~unknown~"
         self.def_strategy = "~unknown~"
 
@@ -34,8 +39,7 @@ class Team:
         pout = self.players[player_out]
         pin = self.players[player_in]
 
-        if self.verbose:
-            print(f"{str(sub_type)} - OUT: {pout.name}, IN: {pin.name}")
+        log.debug("%s - OUT: %s, IN: %s", sub_type, pout.name, pin.name)
 
         if sub_type == SubType.SUB_PG:
             self.active[0] = pin
@@ -66,10 +70,14 @@ class Team:
         self.active[pos1] = p1
         self.active[pos2] = p2
 
-        if self.verbose:
-            print(
-                f"SWAP {self.name} - {p1.name} to {pos_name[pos1]} and {p2.name} to {pos_name[pos2]}"
-            )
+        log.debug(
+            "SWAP %s - %s to %s and %s to %s",
+            self.name,
+            p1.name,
+            pos_name[pos1],
+            p2.name,
+            pos_name[pos2],
+        )
 
     def update_minutes(self, gameclock: int):
         secs = gameclock - self.last_update
@@ -80,10 +88,14 @@ class Team:
         self.active[3].add_stats(Statistic.SecsPF, secs)
         self.active[4].add_stats(Statistic.SecsC, secs)
 
-        if self.verbose:
+        if log.isEnabledFor(logging.DEBUG):
             for player in self.active:
-                print(
-                    f"MINUTES {self.short} - {player.name} +{secs}s = {player.secs_total()}"
+                log.debug(
+                    "MINUTES %s - %s +%ds = %d",
+                    self.short,
+                    player.name,
+                    secs,
+                    player.secs_total(),
                 )
 
         self.last_update = gameclock
@@ -92,17 +104,39 @@ class Team:
         return self.stats.full.sheet[Statistic.Points]
 
     def add_stats(self, stat: Statistic, val: int, pid: Optional[int] = None):
+        debug = log.isEnabledFor(logging.DEBUG)
         if isinstance(pid, int):
-            if self.verbose:
-                print(
-                    f"{self.name},  {self.players[pid - 1].name},  {stat.name}: {val}"
-                )
-            self.players[pid - 1].stats.add(stat, val)
-        else:
-            if self.verbose:
-                print(f"{self.name},  --  {stat.name}: {val}")
+            player = self.players[pid - 1]
+            if debug:
+                log.debug("%s,  %s,  %s: %s", self.name, player.name, stat.name, val)
+            player.stats.add(stat, val)
+        elif debug:
+            log.debug("%s,  --  %s: %s", self.name, stat.name, val)
         self.stats.add(stat, val)
 
+    def snapshot(self) -> tuple:
+        """Everything a replay changes, see Game.snapshot."""
+        return (
+            self.stats.snapshot(),
+            [player.stats.snapshot() for player in self.players],
+            self.active[:],
+            self.last_update,
+            self.shot_chart.snapshot(),
+        )
+
+    def restore(self, state: tuple) -> None:
+        stats, player_stats, active, last_update, shots = state
+        self.stats.restore(stats)
+        for player, player_state in zip(self.players, player_stats):
+            player.stats.restore(player_state)
+        self.active = active[:]
+        self.last_update = last_update
+        self.shot_chart.restore(shots)
+
+    def stat_matrix(self) -> np.ndarray:
+        """Player stats by quarter, shaped (players, quarters, Statistic)."""
+        return np.stack([player.stats.matrix() for player in self.players])
+
     def push_stat_sheet(self):
         self.stats.new_qtr_sheet()
         for player in self.players:
@@ -174,25 +208,30 @@ class Team:
 
             def p_stats_eql(stat: Statistic):
                 if player.stats.full.sheet[stat] != other.stats.full.sheet[stat]:
-                    if __debug__:
-                        print(
-                            f"Not eql: {player.name} - {str(stat)}: {player.stats.full.sheet[stat]} != {other.stats.full.sheet[stat]}"
-                        )
+                    log.debug(
+                        "Not eql: %s - %s: %s != %s",
+                        player.name,
+                        stat,
+                        player.stats.full.sheet[stat],
+                        other.stats.full.sheet[stat],
+                    )
                     return False
                 return True
 
-            if __debug__:
-                print(
-                    player.name,
-                    player.stats.full.minutes() == other.stats.full.minutes(),
-                    player.stats.full.minutes(),
-                    other.stats.full.minutes(),
-                )
+            minutes = player.stats.full.minutes()
+            other_minutes = other.stats.full.minutes()
+            log.debug(
+                "%s %s %s %s",
+                player.name,
+                minutes == other_minutes,
+                minutes,
+                other_minutes,
+            )
 
             player_eql &= (
                 player.id == other.id
                 and player.name == other.name
-                and player.stats.full.minutes() == other.stats.full.minutes()
+                and minutes == other_minutes
                 and p_stats_eql(Statistic.Points)
                 and p_stats_eql(Statistic.FieldGoalsMade)
                 and p_stats_eql(Statistic.FieldGoalsAtt)
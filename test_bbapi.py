@@ -0,0 +1,216 @@
+import http.server
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+import urllib.parse
+
+import requests
+
+from bbapi import BBApi, Network, Prefetcher, read_boxscore, read_schedule
+from stats import Statistic
+from store import DirStore
+
+
+class StubBBApi(http.server.BaseHTTPRequestHandler):
+    """Stands in for bbapi.buzzerbeater.com in the tests below."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        server = self.server
+        server.requests.append((url.path, self.client_address, self.headers))
+        server.events.append((time.monotonic(), url.path, query))
+
+        status, headers, body = 200, {}, '<bbapi version="1"/>'
+        if url.path == "/login.aspx":
+            headers["Set-Cookie"] = "session=stub; Path=/"
+            body = '<bbapi version="1"><loggedIn/></bbapi>'
+        elif url.path == "/player.aspx":
+            body = (
+                '<bbapi version="1"><player id="%s"><bestPosition>C'
+                "</bestPosition></player></bbapi>" % query["playerid"][0]
+            )
+        elif url.path == "/flaky.aspx":
+            server.failures -= 1
+            if server.failures >= 0:
+                status = 503
+        elif url.path == "/slow.aspx":
+            time.sleep(0.5)
+        elif url.path == "/standings.aspx":
+            league = int(query["leagueid"][0])
+            teams = "".join(f'<team id="{league * 10 + t}"/>' for t in range(4))
+            body = (
+                f"<bbapi><standings><regularSeason><conference>{teams}"
+                "</conference></regularSeason></standings></bbapi>"
+            )
+        elif url.path == "/schedule.aspx":
+            team = int(query["teamid"][0])
+            league = team // 10
+            matches = [
+                f'<match id="{min(team, other)}{max(team, other)}" type="league.rs"/>'
+                for other in range(league * 10, league * 10 + 4)
+                if other != team
+            ]
+            matches.append(f'<match id="9{team}" type="cup"/>')
+            body = f"<bbapi><schedule>{''.join(matches)}</schedule></bbapi>"
+            if team == server.slow_team:
+                time.sleep(0.3)
+                server.events.append((time.monotonic(), "done", query))
+        elif url.path == "/boxscore.aspx":
+            body = f'<bbapi><match id="{query["matchid"][0]}"/></bbapi>'
+
+        data = body.encode("utf-8")
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except ConnectionError:
+            pass  # client gave up (timeout test)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestNetwork(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubBBApi)
+        self.server.requests = []
+        self.server.failures = 0
+        self.server.events = []
+        self.server.slow_team = None
+        self.base_url = "http://127.0.0.1:%d/" % self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def network(self, **kwargs):
+        kwargs.setdefault("rate", None)  # no need to be polite to the stub
+        network = Network(base_url=self.base_url, **kwargs)
+        self.addCleanup(network.close)
+        return network
+
+    def test_login_and_keepalive(self):
+        api = BBApi("user", "code", self.network(retries=0))
+        self.assertTrue(api.logged_in)
+        for playerid in range(5):
+            self.assertEqual(api.player(playerid), "C")
+
+        paths = [path for path, _, _ in self.server.requests]
+        self.assertEqual(paths, ["/login.aspx"] + ["/player.aspx"] * 5)
+        # Login cookie is sent back, all over a single pooled connection
+        self.assertEqual(self.server.requests[-1][2]["Cookie"], "session=stub")
+        self.assertEqual(len({addr for _, addr, _ in self.server.requests}), 1)
+
+    def test_retry_with_backoff(self):
+        self.server.failures = 2
+        network = self.network(retries=3, backoff=0.01)
+        self.assertEqual(network.get("flaky.aspx"), '<bbapi version="1"/>')
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_retries_exhausted(self):
+        self.server.failures = 5
+        network = self.network(retries=1, backoff=0.01)
+        with self.assertRaises(requests.RequestException):
+            network.get("flaky.aspx")
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_timeout(self):
+        network = self.network(retries=0, timeout=0.1)
+        with self.assertRaises(requests.RequestException):
+            network.get("slow.aspx")
+
+    def test_rate_limit(self):
+        network = self.network(rate=20)
+        start = time.monotonic()
+        for _ in range(5):
+            network.get("arena.aspx")
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+    def prefetcher(self, cache_dir):
+        api = BBApi("user", "code", self.network(retries=0), DirStore(cache_dir))
+        return Prefetcher(api, workers=4)
+
+    def fetched(self, path):
+        return sorted(q["matchid"][0] for _, p, q in self.server.events if p == path)
+
+    def test_prefetch(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # One league of 4 teams, every pair plays one league match
+            self.server.slow_team = 13
+            ids = self.prefetcher(cache_dir).run([1], [60])
+            self.assertEqual(ids, {"1011", "1012", "1013", "1112", "1113", "1213"})
+            self.assertEqual(self.fetched("/boxscore.aspx"), sorted(ids))
+
+            # Boxscores did not wait for the slow schedule
+            paths = [path for _, path, _ in self.server.events]
+            self.assertLess(paths.index("/boxscore.aspx"), paths.index("done"))
+
+    def test_prefetch_resume(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with open(os.path.join(cache_dir, "boxscore_1011.xml"), "w") as f:
+                f.write("<bbapi/>")
+
+            self.prefetcher(cache_dir).run([1], [60])
+            self.assertNotIn("1011", self.fetched("/boxscore.aspx"))
+
+            # Everything is cached now, a second run only logs in
+            del self.server.events[:]
+            self.assertEqual(len(self.prefetcher(cache_dir).run([1], [60])), 6)
+            self.assertEqual(
+                [path for _, path, _ in self.server.events], ["/login.aspx"]
+            )
+
+
+class TestReaders(unittest.TestCase):
+    BOXSCORE = """<?xml version='1.0' encoding='utf-8'?>
+<bbapi version='1'><match id='1'>
+  <homeTeam id='7'><teamName>Home</teamName><offStrategy>Base</offStrategy>
+    <defStrategy>M2</defStrategy><score partials='20,22,18,25'>85</score>
+    <boxscore><teamTotals><pts>85</pts><oreb>9</oreb><reb>40</reb></teamTotals>
+      <player id='70'><firstName>Jan</firstName><lastName>Nowak Jr</lastName>
+        <minutes><PG>30</PG><SG>5</SG></minutes>
+        <performance><pts>21</pts><fga>15</fga><oreb>2</oreb><reb>7</reb>
+        </performance></player></boxscore></homeTeam>
+  <awayTeam id='8'><teamName>Away</teamName><offStrategy>Push</offStrategy>
+    <defStrategy>Z23</defStrategy><score partials='10,10,10,10'>40</score>
+    <boxscore><teamTotals><pts>40</pts><oreb>1</oreb><reb>2</reb></teamTotals>
+    </boxscore></awayTeam>
+</match></bbapi>"""
+
+    def test_boxscore(self):
+        away, home = read_boxscore(io.BytesIO(self.BOXSCORE.encode("utf-8")))
+        self.assertEqual((away.id, away.name, away.off_strategy), (8, "Away", "Push"))
+        self.assertEqual((home.id, home.name, home.def_strategy), (7, "Home", "M2"))
+        self.assertEqual(home.stats.full.sheet[Statistic.DefRebounds], 31)
+        self.assertEqual(home.stats.qtr[3].sheet[Statistic.Points], 25)
+
+        (player,) = home.players
+        sheet = player.stats.full.sheet
+        self.assertEqual((player.id, player.name), (70, "Jan Nowak Jr"))
+        self.assertEqual(sheet[Statistic.SecsPG], 1800)
+        self.assertEqual(sheet[Statistic.Points], 21)
+        self.assertEqual(sheet[Statistic.DefRebounds], 5)
+        self.assertEqual(away.players, [])
+
+    def test_schedule(self):
+        text = (
+            "<bbapi><schedule><match id='1' type='league.rs'/>"
+            "<match id='2' type='cup'/><match id='3' type='league.rs.tv'/>"
+            "</schedule></bbapi>"
+        )
+        self.assertEqual(read_schedule(io.StringIO(text)), ["1", "3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
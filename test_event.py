@@ -0,0 +1,52 @@
+import math
+import os
+import unittest
+
+import numpy as np
+
+from event import ANGLE_OFFSET, COS, SHOT_ZONES, SIN, create_shot, create_shots
+
+
+class TestCreateShots(unittest.TestCase):
+    def test_tables(self):
+        for deg in range(-195, 196):
+            self.assertEqual(SIN[ANGLE_OFFSET + deg], math.sin(math.radians(deg)))
+            self.assertEqual(SIN[ANGLE_OFFSET - deg], math.sin(-math.radians(deg)))
+            self.assertEqual(COS[ANGLE_OFFSET - deg], math.cos(-math.radians(deg)))
+
+    def test_vectorized(self):
+        rng = np.random.default_rng(0)
+        n = 20000
+        team = rng.integers(0, 2, n)
+        types = rng.choice(list(SHOT_ZONES) + [403, 410, 1000], n)
+        pids = rng.integers(0, 2**31, n)
+        gameclocks = rng.integers(-1, 3600, n)
+
+        x, y = create_shots(team, types, pids, gameclocks)
+        for i in range(n):
+            shot = create_shot(
+                int(team[i]), int(types[i]), int(pids[i]), "", int(gameclocks[i])
+            )
+            self.assertEqual((shot.x, shot.y), (x[i], y[i]))
+
+    def test_shot_area(self):
+        # shot_area/ was drawn with the original per shot version
+        from PIL import Image
+
+        from shot_chart import ShotChart
+
+        if not os.path.isdir("shot_area"):
+            self.skipTest("run from the repository root")
+        for name in sorted(os.listdir("shot_area")):
+            chart = ShotChart()
+            x, y = create_shots(0, int(name[5:-4]), 51805514, np.arange(1, 2881))
+            for posx, posy in zip(x.tolist(), y.tolist()):
+                chart.add_made(posx, posy)
+            with Image.open(os.path.join("shot_area", name)) as expected:
+                self.assertEqual(
+                    chart.render().tobytes(), expected.convert("RGBA").tobytes()
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
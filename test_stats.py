@@ -0,0 +1,52 @@
+import unittest
+
+from stats import Statistic, StatSheet, Stats, merge, stat_matrix
+
+
+class TestStatSheet(unittest.TestCase):
+    def sheet(self, **stats) -> StatSheet:
+        sheet = StatSheet()
+        for name, val in stats.items():
+            sheet.sheet[Statistic[name]] = val
+        return sheet
+
+    def test_view(self):
+        sheet = StatSheet()
+        sheet.values()[Statistic.Points] = 7
+        self.assertEqual(sheet.sheet[Statistic.Points], 7)
+        self.assertIs(type(sheet.player_stats()["pts"]), int)
+
+    def test_add_diff(self):
+        a = self.sheet(Points=10, Assists=2)
+        b = self.sheet(Points=3, Turnovers=1)
+        self.assertEqual(a + b, self.sheet(Points=13, Assists=2, Turnovers=1))
+        self.assertEqual(a - b, self.sheet(Points=7, Assists=2, Turnovers=-1))
+        a += b
+        self.assertEqual(a, self.sheet(Points=13, Assists=2, Turnovers=1))
+
+    def test_merge(self):
+        sheets = [self.sheet(Points=pts) for pts in range(5)]
+        self.assertEqual(stat_matrix(sheets).shape, (5, Statistic.TeamStats))
+        self.assertEqual(merge(sheets).sheet[Statistic.Points], 10)
+        self.assertEqual(merge([]), StatSheet())
+
+    def test_merge_overtime(self):
+        a, b = Stats(), Stats()
+        for stats, quarters in ((a, 4), (b, 5)):
+            for _ in range(quarters):
+                stats.new_qtr_sheet()
+            stats.add(Statistic.Points, 2)
+        a.merge(b)
+        self.assertEqual(a.full.sheet[Statistic.Points], 4)
+        self.assertEqual(a.matrix()[:, Statistic.Points].tolist(), [0, 0, 0, 2, 2])
+
+    def test_normalize(self):
+        sheet = self.sheet(Points=20, SecsPG=900, SecsSG=900)
+        self.assertEqual(sheet.minutes(), 30)
+        self.assertEqual(sheet.per_36()[Statistic.Points], 24)
+        self.assertEqual(sheet.per_possession(80)[Statistic.Points], 25)
+        self.assertEqual(StatSheet().per_36()[Statistic.Points], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
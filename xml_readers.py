@@ -0,0 +1,68 @@
+import io
+import xml.etree.ElementTree as xml
+from typing import IO, Iterator, Union
+
+from player import Player
+from team import Team
+
+
+def iter_xml(source) -> Iterator[tuple[str, tuple[str, ...], xml.Element]]:
+    """Stream ("start" or "end", path, element) over an XML document.
+
+    The path holds the tags from the root down to the element. Text is only
+    complete on "end", after which the element is cleared, so memory use
+    does not grow with the document.
+    """
+    path: list[str] = []
+    for event, elem in xml.iterparse(source, events=("start", "end")):
+        if event == "start":
+            path.append(elem.tag)
+            yield event, tuple(path), elem
+        else:
+            yield event, tuple(path), elem
+            path.pop()
+            elem.clear()
+
+
+def read_report_xml(source: Union[str, IO]) -> dict:
+    """Everything parse_xml takes from a report (text or a stream), before
+    decoding the events."""
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    info = {"teams": [{}, {}], "players": [[], []], "report": ""}
+
+    for event, path, elem in iter_xml(source):
+        if event != "end" or len(path) < 2:
+            continue
+        tag = path[1]
+        if len(path) == 3 and tag in ("HomeTeam", "AwayTeam"):
+            if path[2] in ("ID", "Name", "ShortName"):
+                assert elem.text, f"Missing {tag} {path[2]}"
+                info["teams"][tag == "AwayTeam"][path[2]] = elem.text
+        elif len(path) > 2:
+            continue
+        elif tag.startswith("HPlayer") and not tag.startswith("HPlayerNick"):
+            assert elem.text, "Missing HPlayer string"
+            info["players"][0].append(elem.text)
+        elif tag.startswith("APlayer") and not tag.startswith("APlayerNick"):
+            assert elem.text, "Missing APlayer string"
+            info["players"][1].append(elem.text)
+        elif tag == "ReportString":
+            assert elem.text, "Missing report string"
+            info["report"] = elem.text.strip()
+
+    return info
+
+
+def make_team(fields: dict, names: list[str]) -> Team:
+    team = Team()
+    if "ID" in fields:
+        team.id = int(fields["ID"])
+    team.name = fields.get("Name", "")
+    team.short = fields.get("ShortName", "")
+
+    team.players = [Player(name) for name in names]
+    # Fill upto 12 players, the events reference all 12 slots
+    while len(team.players) < 12:
+        team.players.append(Player("Lucky Fan"))
+    return team